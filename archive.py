@@ -0,0 +1,154 @@
+import gzip
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+GZIP_MAGIC = b"\x1f\x8b\x08"
+READ_CHUNK = 1 << 16
+
+def _members(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    # Complete gzip members as (end offset, payload). A damaged member is
+    # skipped by resyncing on the next gzip header, so members appended
+    # after a torn one stay readable
+    view = memoryview(data)
+    start = 0
+    while start < len(data):
+        decompressor = zlib.decompressobj(wbits=31)
+        pos, parts = start, []
+        try:
+            # Fed in chunks so finding a member's end never copies the rest
+            while not decompressor.eof and pos < len(data):
+                chunk = view[pos:pos + READ_CHUNK]
+                parts.append(decompressor.decompress(chunk))
+                pos += len(chunk)
+        except zlib.error:
+            pass
+        if not decompressor.eof:
+            start = data.find(GZIP_MAGIC, start + 1)
+            if start < 0:
+                return
+            continue
+        start = pos - len(decompressor.unused_data)
+        yield start, b"".join(parts)
+
+class TicketArchive:
+    """Cold tier for closed tickets: one gzip'd JSON-lines file per month.
+    
+    Closed tickets are queued with `store` and appended by `flush`, which the
+    database's background writer runs before flushing the hot set. Each flush
+    adds a gzip member to the month file, so nothing is ever rewritten; a
+    member torn by a crash is cut off before the month's next append.
+    Tickets stay readable from memory until their write has landed.
+    """
+    
+    def __init__(self, path: str, cache_months: int = 2):
+        self.path = path
+        self.cache_months = cache_months
+        self._pending: Dict[str, List[Dict]] = {}
+        # Taken by a flush and being written; months in here are not cached
+        self._inflight: Dict[str, List[Dict]] = {}
+        # Bumped when a month file changes, so a read that raced a write
+        # does not cache what it saw
+        self._generation: Dict[str, int] = {}
+        self._cache: "OrderedDict[str, Dict[str, Dict]]" = OrderedDict()
+        # Months whose file has been checked for a torn tail this run
+        self._checked: Set[str] = set()
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+    
+    @staticmethod
+    def month_of(ticket: Dict) -> str:
+        stamp = ticket.get("closed_at") or ticket["created_at"]
+        return datetime.fromisoformat(stamp).strftime("%Y-%m")
+    
+    def _file(self, month: str) -> str:
+        return os.path.join(self.path, f"{month}.jsonl.gz")
+    
+    def store(self, month: str, ticket: Dict):
+        with self._lock:
+            self._pending.setdefault(month, []).append(ticket)
+    
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for month, tickets in pending.items():
+                self._inflight[month] = tickets
+        for month, tickets in pending.items():
+            lines = "".join(json.dumps(t, default=str) + "\n" for t in tickets)
+            try:
+                if month not in self._checked:
+                    self._truncate_torn(month)
+                    self._checked.add(month)
+                with open(self._file(month), "ab") as f:
+                    with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                        gz.write(lines.encode("utf-8"))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception:
+                with self._lock:
+                    # Put back everything not yet written, ahead of newer stores
+                    for retry in list(self._inflight):
+                        self._pending.setdefault(retry, [])[:0] = self._inflight.pop(retry)
+                raise
+            with self._lock:
+                # Invalidate before the batch stops being readable from memory
+                self._cache.pop(month, None)
+                self._generation[month] = self._generation.get(month, 0) + 1
+                del self._inflight[month]
+    
+    def _read_file(self, month: str) -> bytes:
+        try:
+            with open(self._file(month), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return b""
+    
+    def _truncate_torn(self, month: str):
+        # A crash mid-append leaves a torn last member. Cut back to the end
+        # of the last complete one, so the next append starts cleanly
+        data = self._read_file(month)
+        end = 0
+        for end, _ in _members(data):
+            pass
+        if end < len(data):
+            with open(self._file(month), "r+b") as f:
+                f.truncate(end)
+                os.fsync(f.fileno())
+    
+    def load(self, month: str, ticket_id: str) -> Optional[Dict]:
+        # Not yet written: still in memory
+        with self._lock:
+            for batch in (self._pending.get(month, []), self._inflight.get(month, [])):
+                for ticket in reversed(batch):
+                    if ticket["id"] == ticket_id:
+                        return ticket
+        return self._read_month(month).get(ticket_id)
+    
+    def _read_month(self, month: str) -> Dict[str, Dict]:
+        with self._lock:
+            if month in self._cache:
+                self._cache.move_to_end(month)
+                return self._cache[month]
+            generation = self._generation.get(month, 0)
+        
+        tickets = {}
+        for _, payload in _members(self._read_file(month)):
+            for line in payload.decode("utf-8").splitlines():
+                try:
+                    ticket = json.loads(line)
+                except ValueError:
+                    continue
+                # Later records win if a ticket was archived twice
+                tickets[ticket["id"]] = ticket
+        
+        with self._lock:
+            if month in self._inflight or self._generation.get(month, 0) != generation:
+                return tickets
+            self._cache[month] = tickets
+            while len(self._cache) > self.cache_months:
+                self._cache.popitem(last=False)
+        return tickets
@@ -1,7 +1,25 @@
 import discord
 from discord.ext import commands
+from discord import app_commands
+import time
+from typing import Dict, Optional, Tuple
+
+from cogs.tickets import TICKET_TYPES
+from utils.embeds import EmbedBuilder
+from utils.metrics import timed
+from utils.triggers import DEFAULT_COOLDOWN, KINDS, TriggerEngine, validate_pattern
+
+class TicketState:
+    __slots__ = ('greeted', 'last_fired')
+    
+    def __init__(self):
+        self.greeted = False
+        # Trigger ID -> monotonic time it last fired in this ticket
+        self.last_fired: Dict[str, float] = {}
 
 class AutoResponder(commands.Cog):
+    trigger = app_commands.Group(name="trigger", description="Manage auto-responder triggers")
+    
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.responses = {
@@ -22,37 +40,125 @@ class AutoResponder(commands.Cog):
                 "Please tell us:\n• Your age\n• Your timezone\n• Previous experience\n• Why you want to join"
             ]
         }
+        # Each guild has its own triggers, compiled on first use
+        self._engines: Dict[int, TriggerEngine] = {}
+        self._tickets: Dict[Tuple[int, str], TicketState] = {}
+    
+    def engine(self, guild_id: int) -> TriggerEngine:
+        engine = self._engines.get(guild_id)
+        if engine is None:
+            engine = self._engines[guild_id] = TriggerEngine(self.bot.dbs.get(guild_id).get_triggers())
+        return engine
+    
+    def reload_triggers(self, guild_id: int):
+        self._engines.pop(guild_id, None)
+    
+    def _has_human_messages(self, ticket: dict, current_id: str) -> bool:
+        # Entries from before the bot flag was recorded fall back to the bot's own ID
+        bot_id = str(self.bot.user.id)
+        return any(
+            entry.get('author_id') not in (None, bot_id) and not entry.get('bot')
+            and entry.get('message_id') != current_id
+            for entry in ticket.get('transcript', [])
+        )
     
     @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
-            return
-        
-        # Check if in ticket channel
-        if not message.channel.name.startswith("ticket-"):
-            return
-        
-        # Find ticket
-        from utils.database import TicketDatabase
-        db = TicketDatabase()
+    @timed("event.autoresponder")
+    async def on_ticket_message(self, message: discord.Message, ticket: dict, first_message: bool):
+        # Dispatched by TranscriptRecorder for every human message in an open ticket
+        key = (message.guild.id, ticket['id'])
+        state = self._tickets.get(key)
+        if state is None:
+            state = self._tickets[key] = TicketState()
+            # Only in memory: after a restart, a human who already spoke
+            # means the greeting went out
+            state.greeted = self._has_human_messages(ticket, str(message.id))
         
-        ticket = None
-        for tid, tdata in db.data['tickets'].items():
-            if str(tdata['channel_id']) == str(message.channel.id) and tdata['status'] == 'open':
-                ticket = tdata
-                break
+        if first_message and not state.greeted:
+            state.greeted = True
+            responses = self.responses.get(ticket['type'], [])
+            for resp in responses:
+                await message.channel.send(resp)
         
-        if not ticket:
+        # Triggers answer the ticket owner only, not staff replies
+        if str(message.author.id) != ticket['user_id']:
             return
         
-        # Check if first message from user
-        user_messages = [m for m in ticket.get('transcript', []) 
-                        if m['author'] == f"{message.author.name}#{message.author.discriminator}"]
+        now = time.monotonic()
+        engine = self.engine(message.guild.id)
+        cooling = {
+            rule_id for rule_id, fired in state.last_fired.items()
+            if rule_id in engine.rules and now - fired < engine.rules[rule_id].get('cooldown', DEFAULT_COOLDOWN)
+        }
+        for rule in engine.matches(message.content, ticket['type'], cooling):
+            state.last_fired[rule['id']] = now
+            if rule['kind'] == 'faq':
+                await message.channel.send(embed=EmbedBuilder.info(rule['response'], title=f"📖 {rule['pattern']}"))
+            else:
+                await message.channel.send(rule['response'])
+            # One answer per message
+            break
+    
+    @commands.Cog.listener()
+    async def on_ticket_closed(self, guild_id: int, ticket_id: str):
+        self._tickets.pop((guild_id, ticket_id), None)
+    
+    @trigger.command(name="add", description="Add an auto-responder trigger")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(
+        kind="keyword and faq match whole words; regex is matched as written",
+        pattern="Words or regular expression to look for",
+        response="What the bot replies with",
+        cooldown="Seconds before this trigger can fire again in the same ticket",
+        ticket_type="Only fire in tickets of this type"
+    )
+    @app_commands.choices(
+        kind=[app_commands.Choice(name=k, value=k) for k in KINDS],
+        ticket_type=[app_commands.Choice(name=info['label'], value=key) for key, info in TICKET_TYPES.items()]
+    )
+    @timed("command.trigger_add")
+    async def trigger_add(self, interaction: discord.Interaction, kind: app_commands.Choice[str], pattern: str,
+                          response: str, cooldown: Optional[app_commands.Range[int, 0, 86400]] = None,
+                          ticket_type: Optional[app_commands.Choice[str]] = None):
+        error = validate_pattern(kind.value, pattern)
+        if error:
+            await interaction.response.send_message(embed=EmbedBuilder.error(error), ephemeral=True)
+            return
         
-        if len(user_messages) == 0:  # First message
-            responses = self.responses.get(ticket['type'], [])
-            for resp in responses:
-                await message.channel.send(resp)
+        trigger_id = self.bot.dbs.get(interaction.guild_id).add_trigger(
+            kind.value, pattern, response, str(interaction.user.id),
+            DEFAULT_COOLDOWN if cooldown is None else cooldown,
+            [ticket_type.value] if ticket_type else None
+        )
+        self.reload_triggers(interaction.guild_id)
+        await interaction.response.send_message(
+            embed=EmbedBuilder.success(f"Added {kind.value} trigger `#{trigger_id}` for `{pattern}`"),
+            ephemeral=True
+        )
+    
+    @trigger.command(name="remove", description="Remove an auto-responder trigger")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(trigger_id="Trigger number from /trigger list")
+    @timed("command.trigger_remove")
+    async def trigger_remove(self, interaction: discord.Interaction, trigger_id: int):
+        if self.bot.dbs.get(interaction.guild_id).remove_trigger(str(trigger_id)):
+            self.reload_triggers(interaction.guild_id)
+            await interaction.response.send_message(
+                embed=EmbedBuilder.success(f"Removed trigger `#{trigger_id}`"),
+                ephemeral=True
+            )
+        else:
+            await interaction.response.send_message(
+                embed=EmbedBuilder.error(f"No trigger `#{trigger_id}`"),
+                ephemeral=True
+            )
+    
+    @trigger.command(name="list", description="List auto-responder triggers")
+    @app_commands.checks.has_permissions(administrator=True)
+    @timed("command.trigger_list")
+    async def trigger_list(self, interaction: discord.Interaction):
+        embed = EmbedBuilder.triggers(list(self.bot.dbs.get(interaction.guild_id).get_triggers().values()))
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(AutoResponder(bot))
@@ -0,0 +1,255 @@
+"""Offline load test of the ticket hot paths against synthetic histories.
+    
+    python benchmarks/bench_suite.py [--sizes 1000,10000,100000] [--ops 300]
+                                     [--save baseline] [--compare baseline]
+
+Drives the real cogs through the fakes in benchmarks/fakes.py: opening,
+ticket messages (recorder + auto-responder), claiming, closing (confirm
+and the background close job) and /stats, cold and cached. Reports
+throughput, p50/p99 latency and peak traced memory per scenario.
+
+--save writes the results to benchmarks/baselines/<name>.json; --compare
+reads one back and exits non-zero if any scenario got slower or hungrier
+than --tolerance allows. Compare runs made with the same options on the
+same machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datasets import PHRASES, working_copy
+from benchmarks.fakes import (FakeBot, FakeGuild, FakeInteraction, FakeLatency, FakeMessage, FakeRole,
+                              FakeTextChannel, FakeUser)
+from cogs import jobs
+from cogs.autoresponder import AutoResponder
+from cogs.jobs import CloseQueue
+from cogs.recorder import TranscriptRecorder
+from cogs.stats import Stats
+from cogs.tickets import TICKET_TYPES, ConfirmCloseView, TicketControlView, TicketTypeSelect
+from utils.database import GuildDatabases, TicketDatabase
+from utils.embeds import embed_cache
+from utils.storage import JournalBackend
+
+CATEGORY_ID = 1473374359568781403
+STAFF_ROLE_ID = 1441463909155344576
+TRANSCRIPTS_CHANNEL_ID = 1466878461632315527
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+MESSAGES_PER_TICKET = 5
+TRIGGERS = 50
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class Scenario:
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: List[float] = []
+    
+    def __enter__(self):
+        tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.started
+        self.peak = tracemalloc.get_traced_memory()[1]
+    
+    async def op(self, coro):
+        started = time.perf_counter()
+        await coro
+        self.timings.append(time.perf_counter() - started)
+    
+    def result(self, ops: Optional[int] = None) -> Dict:
+        ops = ops if ops is not None else len(self.timings)
+        p50, p99 = percentile(self.timings, 0.5), percentile(self.timings, 0.99)
+        return {
+            "ops": ops,
+            "ops_per_sec": ops / self.wall if self.wall else None,
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p99_ms": p99 * 1000 if p99 is not None else None,
+            "peak_mib": self.peak / 2 ** 20
+        }
+
+async def run_size(size: int, args) -> Dict[str, Dict]:
+    rng = random.Random(size)
+    path = working_copy(size, args.messages)
+    results = {}
+    
+    with Scenario("load") as s:
+        db = TicketDatabase(JournalBackend(path))
+    s.timings.append(s.wall)
+    results["load"] = s.result()
+    await db.start()
+    
+    delay = args.api_latency / 1000
+    guild = FakeGuild(latency=FakeLatency(delay, delay))
+    guild.add_channel(CATEGORY_ID, type("Category", (), {"text_channels": []})())
+    staff_role = guild.add_role(FakeRole("Staff", STAFF_ROLE_ID))
+    guild.add_channel(TRANSCRIPTS_CHANNEL_ID, FakeTextChannel(guild, "transcripts"))
+    staff = guild.add_member(FakeUser(roles=[staff_role]))
+    db.set_config('category_id', str(CATEGORY_ID))
+    db.set_config('staff_role_id', str(STAFF_ROLE_ID))
+    db.set_config('transcripts_channel_id', str(TRANSCRIPTS_CHANNEL_ID))
+    
+    for n in range(TRIGGERS):
+        db.add_trigger("keyword", f"keyword{n} answer", f"Answer {n}", str(staff.id), 60)
+    db.add_trigger("faq", "refund", "Refunds take 24-48 hours.", str(staff.id), 60)
+    
+    bot = FakeBot(GuildDatabases(path, {guild.id: db}), guild)
+    for cog in (TranscriptRecorder(bot), AutoResponder(bot), CloseQueue(bot), Stats(bot)):
+        await bot.add_cog(cog)
+    stats = bot.get_cog("Stats")
+    recorder = bot.get_cog("TranscriptRecorder")
+    
+    # /stats, rebuilding the embed every time and then straight from the cache
+    with Scenario("stats_cold") as s:
+        for n in range(args.ops):
+            embed_cache.clear()
+            interaction = FakeInteraction(bot, guild, staff)
+            await s.op(stats.view_stats.callback(stats, interaction, None))
+    results["stats_cold"] = s.result()
+    with Scenario("stats_cached") as s:
+        for n in range(args.ops):
+            interaction = FakeInteraction(bot, guild, staff)
+            await s.op(stats.view_stats.callback(stats, interaction, None))
+    results["stats_cached"] = s.result()
+    
+    # Opening from the panel
+    select = TicketTypeSelect()
+    owners = [guild.add_member(FakeUser()) for _ in range(args.ops)]
+    with Scenario("open") as s:
+        for owner in owners:
+            await s.op(select.open_ticket(FakeInteraction(bot, guild, owner), rng.choice(list(TICKET_TYPES))))
+    results["open"] = s.result()
+    
+    opened = []
+    for owner in owners:
+        ticket_id = next(iter(db.get_user_tickets(str(owner.id))))
+        ticket = db.get_ticket(ticket_id)
+        opened.append((ticket_id, owner, guild.get_channel(int(ticket["channel_id"]))))
+    
+    # Messages in the new tickets: recorder, first-message greeting, triggers
+    with Scenario("message") as s:
+        for n in range(MESSAGES_PER_TICKET):
+            for ticket_id, owner, channel in opened:
+                text = rng.choice(PHRASES) + (f" keyword{rng.randrange(TRIGGERS)} answer" if n == 2 else "")
+                await s.op(recorder.on_message(FakeMessage(channel, owner, text)))
+                await bot.drain()
+    results["message"] = s.result()
+    
+    with Scenario("claim") as s:
+        for ticket_id, owner, channel in opened:
+            interaction = FakeInteraction(bot, guild, staff, channel, channel.messages[0])
+            await s.op(TicketControlView.claim(interaction, ticket_id))
+    results["claim"] = s.result()
+    
+    # Confirming is all the user waits for; the close job (archive, transcript
+    # upload, rating DM, delete) runs behind it and is timed to completion
+    jobs.DELETE_DELAY = 0
+    finished = Scenario("close_job")
+    with Scenario("close_confirm") as s:
+        for ticket_id, owner, channel in opened:
+            started = time.perf_counter()
+            interaction = FakeInteraction(bot, guild, owner, channel)
+            view = ConfirmCloseView(ticket_id)
+            await s.op(view.confirm_close.callback(interaction))
+            while db.get_job(f"close:{ticket_id}"):
+                await asyncio.sleep(0.001)
+            finished.timings.append(time.perf_counter() - started)
+    results["close_confirm"] = s.result()
+    finished.wall, finished.peak = s.wall, s.peak
+    results["close_job"] = finished.result()
+    
+    await bot.remove_cogs()
+    await db.close()
+    shutil.rmtree(path, ignore_errors=True)
+    return results
+
+def print_results(size: int, results: Dict[str, Dict]):
+    print(f"\n{size:,} tickets")
+    print(f"  {'scenario':<14} {'ops':>6} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak MiB':>9}")
+    for name, r in results.items():
+        fmt = lambda v, spec: format(v, spec) if v is not None else "-"
+        print(f"  {name:<14} {r['ops']:>6} {fmt(r['ops_per_sec'], '>10.1f')} {fmt(r['p50_ms'], '>9.3f')} "
+              f"{fmt(r['p99_ms'], '>9.3f')} {r['peak_mib']:>9.1f}")
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for size, scenarios in current["results"].items():
+        for name, r in scenarios.items():
+            base = baseline["results"].get(size, {}).get(name)
+            if not base:
+                continue
+            for key in ("p50_ms", "p99_ms", "peak_mib"):
+                if r[key] is not None and base[key] and r[key] > base[key] * (1 + tolerance):
+                    regressions.append(f"{size} {name}: {key} {base[key]:.3f} -> {r[key]:.3f}")
+            if r["ops_per_sec"] and base["ops_per_sec"] and r["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+                regressions.append(
+                    f"{size} {name}: ops/s {base['ops_per_sec']:.1f} -> {r['ops_per_sec']:.1f}"
+                )
+    return regressions
+
+async def main_async(args) -> int:
+    sizes = [int(s) for s in args.sizes.split(",")]
+    tracemalloc.start()
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "ops": args.ops,
+            "messages": args.messages,
+            "api_latency_ms": args.api_latency
+        },
+        "results": {}
+    }
+    for size in sizes:
+        report["results"][str(size)] = results = await run_size(size, args)
+        print_results(size, results)
+    tracemalloc.stop()
+    
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved {path}")
+    
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        if baseline["meta"] != report["meta"]:
+            print(f"\nWarning: baseline was recorded with {baseline['meta']}")
+        regressions = compare(report, baseline, args.tolerance)
+        print(f"\n{len(regressions)} regression(s) against '{args.compare}' (tolerance {args.tolerance:.0%})")
+        for line in regressions:
+            print(f"  {line}")
+        return 1 if regressions else 0
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated ticket counts")
+    parser.add_argument("--ops", type=int, default=300, help="Operations per scenario")
+    parser.add_argument("--messages", type=int, default=15, help="Average transcript length in the dataset")
+    parser.add_argument("--api-latency", type=float, default=0, help="Simulated Discord round trip in ms")
+    parser.add_argument("--save", metavar="NAME", help="Save results as a baseline")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
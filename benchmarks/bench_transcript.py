@@ -0,0 +1,77 @@
+"""Render time for large transcripts.
+
+    python benchmarks/bench_transcript.py [--messages 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.transcript import render_transcript
+
+def build_ticket(messages: int) -> dict:
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    transcript = []
+    for i in range(messages):
+        msg = {
+            "message_id": str(1_000_000 + i),
+            "author": f"user{i % 7}",
+            "author_id": str(i % 7),
+            "avatar": f"https://cdn.discordapp.com/avatars/{i % 7}/abc.png",
+            "content": f"Message {i}: <order> & details " + "lorem ipsum " * (i % 12),
+            "timestamp": (start + timedelta(seconds=i * 3)).isoformat(),
+            "attachments": [f"https://cdn.discordapp.com/attachments/1/{i}/shot.png"] if i % 50 == 0 else []
+        }
+        if i % 200 == 0:
+            msg["embeds"] = [{"title": "Order summary", "description": "Total: $10", "color": 0xDC2626}]
+        transcript.append(msg)
+        if i % 100 == 99:
+            transcript.append({"event": "edit", "message_id": msg["message_id"],
+                               "content": "edited", "timestamp": msg["timestamp"]})
+    
+    return {
+        "id": "ticket-9999",
+        "user_id": "1",
+        "type": "order",
+        "status": "closed",
+        "created_at": start.isoformat(),
+        "claimed_by": "2",
+        "claimed_at": (start + timedelta(minutes=3)).isoformat(),
+        "closed_by": "2",
+        "closed_at": (start + timedelta(hours=9)).isoformat(),
+        "rating": {"stars": 5, "feedback": "fast", "rated_at": start.isoformat()},
+        "transcript": transcript
+    }
+
+def bench(ticket: dict, fmt: str, compress: bool, repeat: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        buffer = render_transcript(ticket, "Order", fmt, compress)
+        timings.append(time.perf_counter() - started)
+        buffer.seek(0, os.SEEK_END)
+        size = buffer.tell()
+        buffer.close()
+    timings.sort()
+    return timings[len(timings) // 2], timings[0], size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    ticket = build_ticket(args.messages)
+    print(f"{args.messages} messages, {args.repeat} runs each")
+    for fmt in ("text", "html"):
+        for compress in (False, True):
+            median, best, size = bench(ticket, fmt, compress, args.repeat)
+            label = fmt + (" +gzip" if compress else "")
+            print(f"  {label:<12} median {median * 1000:8.1f} ms   best {best * 1000:8.1f} ms   {size / 1024:9.1f} KiB")
+
+if __name__ == "__main__":
+    main()
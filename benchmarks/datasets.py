@@ -0,0 +1,160 @@
+"""Synthetic ticket histories for the benchmarks.
+
+A dataset is written once in the bot's own on-disk layout (journal
+snapshot plus monthly archive files) and cached under the system temp
+directory, so repeated runs only pay for generation the first time.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.archive import TicketArchive
+from utils.database import TicketDatabase
+from utils.storage import JournalBackend, empty_data
+
+TICKET_TYPES = ('support', 'order', 'staff', 'refund')
+# Share of tickets each type gets, roughly what the live server sees
+TYPE_WEIGHTS = (50, 30, 5, 15)
+PHRASES = (
+    "hey, I need some help with my order",
+    "can you check the status of my refund please",
+    "what's the price for the premium package?",
+    "it still doesn't work after the update",
+    "thanks, that fixed it!",
+    "here's a screenshot of the error",
+    "I paid with paypal yesterday",
+    "how long does delivery usually take",
+    "ok, I'll wait",
+    "can I get an invoice for this?"
+)
+USERS = 5000
+STAFF = 25
+
+def dataset_path(tickets: int, messages: int, seed: int) -> str:
+    return os.path.join(tempfile.gettempdir(), "west-bench", f"{tickets}-{messages}-{seed}")
+
+def _transcript(rng: random.Random, ticket_id: str, user_id: str, staff_id: str, start: datetime,
+                messages: int) -> List[Dict]:
+    transcript = []
+    when = start
+    for i in range(max(1, int(rng.expovariate(1 / messages)))):
+        author_id = user_id if i % 3 != 1 else staff_id
+        when += timedelta(seconds=rng.randint(5, 900))
+        text = rng.choice(PHRASES)
+        transcript.append({
+            "message_id": f"{ticket_id[7:]}{i:04d}",
+            "author": f"user{author_id}",
+            "author_id": author_id,
+            "avatar": f"https://cdn.discordapp.com/avatars/{author_id}/a.png",
+            "content": text if rng.random() < 0.8 else text + " " + " ".join(rng.sample(PHRASES, 3)),
+            "timestamp": when.isoformat(),
+            "attachments": [f"https://cdn.discordapp.com/attachments/1/{i}/shot.png"] if rng.random() < 0.03 else []
+        })
+    return transcript
+
+def build_dataset(path: str, tickets: int, messages: int = 15, open_ratio: float = 0.02, seed: int = 1):
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    archive = TicketArchive(os.path.join(path, "archive"))
+    data = empty_data()
+    stats = data['stats']
+    
+    # Spread over the last year, oldest first, like a real ticket counter
+    end = datetime.now() - timedelta(hours=1)
+    step = timedelta(days=365) / tickets
+    start = end - timedelta(days=365)
+    opened = 0
+    
+    for n in range(1, tickets + 1):
+        ticket_id = f"ticket-{n:04d}"
+        created = start + step * n
+        ticket_type = rng.choices(TICKET_TYPES, TYPE_WEIGHTS)[0]
+        user_id = str(100_000 + rng.randrange(USERS))
+        staff_id = str(900_000 + rng.randrange(STAFF))
+        ticket = {
+            "id": ticket_id,
+            "user_id": user_id,
+            "channel_id": str(500_000_000 + n),
+            "type": ticket_type,
+            "status": "open",
+            "created_at": created.isoformat(),
+            "claimed_by": None,
+            "claimed_at": None,
+            "closed_at": None,
+            "closed_by": None,
+            "rating": None,
+            "transcript": _transcript(rng, ticket_id, user_id, staff_id, created, messages)
+        }
+        stats.setdefault('tickets_created', {}).setdefault(ticket_type, 0)
+        stats['tickets_created'][ticket_type] += 1
+        
+        # Only the newest tickets are still open
+        if n > tickets * (1 - open_ratio):
+            data['tickets'][ticket_id] = ticket
+            opened += 1
+            continue
+        
+        claimed = created + timedelta(minutes=rng.expovariate(1 / 12))
+        closed = claimed + timedelta(hours=rng.expovariate(1 / 6))
+        ticket.update({
+            "status": "closed",
+            "claimed_by": staff_id,
+            "claimed_at": claimed.isoformat(),
+            "closed_by": staff_id,
+            "closed_at": closed.isoformat()
+        })
+        stats.setdefault('tickets_closed', {}).setdefault(ticket_type, 0)
+        stats['tickets_closed'][ticket_type] += 1
+        if rng.random() < 0.6:
+            rating = {
+                "stars": rng.choices((1, 2, 3, 4, 5), (3, 4, 10, 30, 53))[0],
+                "feedback": None,
+                "rated_at": (closed + timedelta(minutes=5)).isoformat()
+            }
+            ticket["rating"] = rating
+            data['ratings'][ticket_id] = rating
+            stats.setdefault('ratings', {}).setdefault(str(rating['stars']), 0)
+            stats['ratings'][str(rating['stars'])] += 1
+        
+        month = TicketArchive.month_of(ticket)
+        archive.store(month, ticket)
+        summary = {k: v for k, v in ticket.items() if k != "transcript"}
+        summary["archive"] = month
+        data['tickets'][ticket_id] = summary
+        if n % 5000 == 0:
+            archive.flush()
+    
+    archive.flush()
+    backend = JournalBackend(path)
+    backend._write_snapshot(data, 0)
+    
+    # One load backfills the rollups and rating aggregates; compacting bakes
+    # them into the snapshot so every benchmark starts from steady state
+    db = TicketDatabase(JournalBackend(path))
+    db.backend.compact()
+    db.backend.close()
+    with open(os.path.join(path, ".complete"), "w") as f:
+        f.write(f"{tickets} tickets, {opened} open\n")
+
+def ensure_dataset(tickets: int, messages: int = 15, seed: int = 1) -> str:
+    path = dataset_path(tickets, messages, seed)
+    if not os.path.exists(os.path.join(path, ".complete")):
+        shutil.rmtree(path, ignore_errors=True)
+        build_dataset(path, tickets, messages, seed=seed)
+    return path
+
+def working_copy(tickets: int, messages: int = 15, seed: int = 1) -> str:
+    # Benchmarks write to the database, so each run gets its own copy
+    target = tempfile.mkdtemp(prefix="west-bench-run-")
+    shutil.copytree(ensure_dataset(tickets, messages, seed), target, dirs_exist_ok=True)
+    return target
+
+if __name__ == "__main__":
+    for size in map(int, sys.argv[1:] or ["1000"]):
+        print(ensure_dataset(size))
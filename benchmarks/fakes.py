@@ -0,0 +1,247 @@
+"""Network-free stand-ins for the discord.py objects the cogs touch.
+
+Only the attributes and coroutines the bot actually uses are modelled.
+API round trips are simulated with asyncio.sleep so concurrency behaves
+like it does against the gateway.
+"""
+import asyncio
+import itertools
+import random
+from typing import Dict, List, Optional
+
+_ids = itertools.count(10_000_000)
+
+def next_id() -> int:
+    return next(_ids)
+
+class FakeLatency:
+    def __init__(self, low: float = 0.0, high: float = 0.0):
+        self.low = low
+        self.high = high
+    
+    async def wait(self):
+        await asyncio.sleep(random.uniform(self.low, self.high) if self.high else 0)
+
+class FakeRole:
+    def __init__(self, name: str = "role", role_id: Optional[int] = None):
+        self.id = role_id or next_id()
+        self.name = name
+        self.mention = f"<@&{self.id}>"
+
+class FakeUser:
+    def __init__(self, user_id: Optional[int] = None, name: Optional[str] = None, roles: List[FakeRole] = None,
+                 bot: bool = False):
+        self.id = user_id or next_id()
+        self.name = name or f"user{self.id}"
+        self.discriminator = "0"
+        self.mention = f"<@{self.id}>"
+        self.roles = roles or []
+        self.bot = bot
+        self.dms: List[dict] = []
+        self.display_avatar = type("Asset", (), {"url": f"https://cdn.discordapp.com/avatars/{self.id}/a.png"})()
+    
+    def __str__(self):
+        return self.name
+    
+    async def send(self, content=None, **kwargs):
+        self.dms.append({"content": content, **kwargs})
+
+class FakeMessage:
+    def __init__(self, channel: "FakeTextChannel", author: FakeUser, content: str = "", embeds=None, **kwargs):
+        from datetime import datetime, timezone
+        self.id = next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embeds = embeds or []
+        self.attachments = []
+        self.created_at = datetime.now(timezone.utc)
+        self.kwargs = kwargs
+    
+    async def edit(self, **kwargs):
+        self.kwargs.update(kwargs)
+
+class FakeTextChannel:
+    def __init__(self, guild: "FakeGuild", name: str, category=None, topic: str = None, overwrites=None):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.topic = topic
+        self.overwrites = dict(overwrites or {})
+        self.mention = f"<#{self.id}>"
+        self.messages: List[FakeMessage] = []
+        self.deleted = False
+    
+    async def send(self, content=None, **kwargs):
+        await self.guild.latency.wait()
+        message = FakeMessage(self, self.guild.me, content or "", kwargs.pop("embeds", None), **kwargs)
+        if "embed" in kwargs:
+            message.embeds = [kwargs["embed"]]
+        self.messages.append(message)
+        return message
+    
+    async def set_permissions(self, target, overwrite=None, **perms):
+        await self.guild.latency.wait()
+        self.overwrites[target] = overwrite if overwrite is not None or not perms else perms
+    
+    async def edit(self, **kwargs):
+        await self.guild.latency.wait()
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+    
+    async def delete(self):
+        await self.guild.latency.wait()
+        self.deleted = True
+        self.guild.channels.pop(self.id, None)
+
+class FakeGuild:
+    def __init__(self, guild_id: Optional[int] = None, latency: FakeLatency = None):
+        self.id = guild_id or next_id()
+        self.latency = latency or FakeLatency()
+        self.default_role = FakeRole("@everyone", self.id)
+        self.me = FakeUser(name="West", bot=True)
+        self.channels: Dict[int, object] = {}
+        self.roles: Dict[int, FakeRole] = {}
+        self.members: Dict[int, FakeUser] = {}
+        self.created_channels = 0
+    
+    def add_channel(self, channel_id: int, channel):
+        channel.id = channel_id
+        self.channels[channel_id] = channel
+        return channel
+    
+    def add_role(self, role: FakeRole) -> FakeRole:
+        self.roles[role.id] = role
+        return role
+    
+    def add_member(self, member: FakeUser) -> FakeUser:
+        self.members[member.id] = member
+        return member
+    
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+    
+    def get_role(self, role_id: int):
+        return self.roles.get(role_id)
+    
+    def get_member(self, user_id: int):
+        return self.members.get(user_id)
+    
+    async def create_text_channel(self, name: str, category=None, overwrites=None, topic: str = None, **kwargs):
+        await self.latency.wait()
+        channel = FakeTextChannel(self, name, category, topic, overwrites)
+        self.channels[channel.id] = channel
+        self.created_channels += 1
+        return channel
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self.sent: List[dict] = []
+        self._done = False
+    
+    def is_done(self) -> bool:
+        return self._done
+    
+    async def _respond(self, **payload):
+        if self._done:
+            raise RuntimeError("Interaction has already been responded to")
+        await self.interaction.guild.latency.wait()
+        self._done = True
+        self.sent.append(payload)
+    
+    async def send_message(self, content=None, **kwargs):
+        await self._respond(content=content, **kwargs)
+    
+    async def defer(self, **kwargs):
+        await self._respond(deferred=True, **kwargs)
+    
+    async def edit_message(self, **kwargs):
+        await self._respond(edit=True, **kwargs)
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self.sent: List[dict] = []
+    
+    async def send(self, content=None, **kwargs):
+        if not self.interaction.response.is_done():
+            raise RuntimeError("Followup sent before the interaction was acknowledged")
+        await self.interaction.guild.latency.wait()
+        self.sent.append({"content": content, **kwargs})
+
+class FakeClient:
+    def __init__(self, dbs, cogs: Dict[str, object] = None):
+        # A GuildDatabases holding the partitions of the fake guilds
+        self.dbs = dbs
+        self.cogs = cogs or {}
+    
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+    
+    def get_user(self, user_id: int):
+        return None
+    
+    def dispatch(self, event: str, *args):
+        pass
+
+class FakeInteraction:
+    def __init__(self, client: FakeClient, guild: FakeGuild, user: FakeUser, channel=None, message=None):
+        self.id = next_id()
+        self.client = client
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = channel
+        self.message = message
+        self.data: dict = {}
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+    
+    @property
+    def replies(self) -> List[dict]:
+        return self.response.sent + self.followup.sent
+
+class FakeBot(FakeClient):
+    """Enough of commands.Bot to host cogs without a gateway connection."""
+    
+    def __init__(self, dbs, guild: FakeGuild):
+        super().__init__(dbs)
+        self.guild = guild
+        self.user = guild.me
+        self.latency = 0.05
+        self.listeners: Dict[str, List] = {}
+        self._tasks = set()
+    
+    async def add_cog(self, cog):
+        self.cogs[cog.__cog_name__] = cog
+        for name, listener in cog.get_listeners():
+            self.listeners.setdefault(name, []).append(listener)
+        await cog.cog_load()
+    
+    async def remove_cogs(self):
+        for cog in list(self.cogs.values()):
+            await cog.cog_unload()
+        self.cogs.clear()
+    
+    def get_channel(self, channel_id: int):
+        return self.guild.get_channel(channel_id)
+    
+    def get_guild(self, guild_id: int):
+        return self.guild
+    
+    async def wait_until_ready(self):
+        pass
+    
+    def dispatch(self, event: str, *args):
+        for listener in self.listeners.get(f"on_{event}", ()):
+            task = asyncio.create_task(listener(*args))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def drain(self):
+        # Wait for every listener dispatched so far
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
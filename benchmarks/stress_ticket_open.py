@@ -0,0 +1,103 @@
+"""Fires hundreds of simultaneous panel selections at the ticket open path.
+    
+    python benchmarks/stress_ticket_open.py [--users 300] [--clicks 3]
+
+Every user clicks the panel several times at once (double clicks, several
+panels), with randomised API latency. The run fails if any two tickets
+share an ID or channel, a user ends up with more than one open ticket, or
+an interaction is acknowledged twice.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeClient, FakeGuild, FakeInteraction, FakeLatency, FakeRole, FakeUser
+from cogs.tickets import TICKET_TYPES, TicketTypeSelect
+from utils.database import GuildDatabases, TicketDatabase
+from utils.metrics import latency_report
+from utils.storage import create_backend
+
+CATEGORY_ID = 1473374359568781403
+STAFF_ROLE_ID = 1441463909155344576
+
+async def run(users: int, clicks: int) -> int:
+    with tempfile.TemporaryDirectory() as data_dir:
+        db = TicketDatabase(create_backend('journal', data_dir))
+        await db.start()
+        
+        guild = FakeGuild(latency=FakeLatency(0.001, 0.05))
+        guild.add_channel(CATEGORY_ID, type("Category", (), {})())
+        guild.add_role(FakeRole("Staff", STAFF_ROLE_ID))
+        db.set_config('category_id', str(CATEGORY_ID))
+        db.set_config('staff_role_id', str(STAFF_ROLE_ID))
+        client = FakeClient(GuildDatabases(data_dir, {guild.id: db}))
+        select = TicketTypeSelect()
+        
+        interactions = []
+        for _ in range(users):
+            user = FakeUser()
+            for _ in range(clicks):
+                interactions.append(FakeInteraction(client, guild, user))
+        random.shuffle(interactions)
+        
+        results = await asyncio.gather(
+            *(select.open_ticket(i, random.choice(list(TICKET_TYPES))) for i in interactions),
+            return_exceptions=True
+        )
+        await db.close()
+        
+        failures = []
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            failures.append(f"{len(errors)} callbacks raised, first: {errors[0]!r}")
+        
+        tickets = db.data['tickets']
+        per_user = Counter(t['user_id'] for t in tickets.values() if t['status'] == 'open')
+        channels = Counter(t['channel_id'] for t in tickets.values())
+        names = {str(c.id): c.name for c in guild.channels.values() if hasattr(c, 'messages')}
+        
+        if len(tickets) != users:
+            failures.append(f"expected {users} tickets, got {len(tickets)}")
+        if any(n > 1 for n in per_user.values()):
+            failures.append(f"{sum(1 for n in per_user.values() if n > 1)} users got more than one ticket")
+        if any(n > 1 for n in channels.values()):
+            failures.append("tickets share a channel")
+        if guild.created_channels != len(tickets):
+            failures.append(f"{guild.created_channels} channels created for {len(tickets)} tickets")
+        mismatched = [tid for tid, t in tickets.items() if names.get(t['channel_id']) != tid]
+        if mismatched:
+            failures.append(f"{len(mismatched)} channels not named after their ticket, e.g. {mismatched[0]}")
+        double_acks = [i for i in interactions if len(i.response.sent) > 1]
+        if double_acks:
+            failures.append(f"{len(double_acks)} interactions acknowledged twice")
+        unanswered = [i for i in interactions if not i.response.sent or (i.response.sent[0].get('deferred') and not i.followup.sent)]
+        if unanswered:
+            failures.append(f"{len(unanswered)} interactions never got a reply")
+        
+        print(f"{len(interactions)} selections from {users} users -> {len(tickets)} tickets, "
+              f"{guild.created_channels} channels")
+        for name, summary in latency_report().items():
+            if summary['count']:
+                print(f"  {name:<20} p50 {summary['p50'] * 1000:7.1f}ms  p99 {summary['p99'] * 1000:7.1f}ms  "
+                      f"({summary['count']} samples)")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        if not failures:
+            print("OK")
+        return 1 if failures else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--clicks", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.users, args.clicks)))
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from datetime import datetime, timedelta
+from typing import Optional
 
 from utils.embeds import EmbedBuilder
-from utils.database import TicketDatabase
-
-db = TicketDatabase()
+from utils.metrics import timed
 
 class Blacklist(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -13,8 +13,15 @@ class Blacklist(commands.Cog):
     
     @app_commands.command(name="blacklist", description="Blacklist a user from tickets")
     @app_commands.checks.has_permissions(administrator=True)
-    @app_commands.describe(user="User to blacklist", reason="Reason for blacklist")
-    async def blacklist_add(self, interaction: discord.Interaction, user: discord.Member, reason: str):
+    @app_commands.describe(
+        user="User to blacklist",
+        reason="Reason for blacklist",
+        hours="Lift the blacklist automatically after this many hours"
+    )
+    @timed("command.blacklist")
+    async def blacklist_add(self, interaction: discord.Interaction, user: discord.Member, reason: str,
+                            hours: Optional[app_commands.Range[int, 1, 8760]] = None):
+        db = self.bot.dbs.get(interaction.guild_id)
         if db.is_blacklisted(str(user.id)):
             await interaction.response.send_message(
                 embed=EmbedBuilder.error(f"{user.mention} is already blacklisted!"),
@@ -22,16 +29,20 @@ class Blacklist(commands.Cog):
             )
             return
         
-        db.blacklist_add(str(user.id), reason, str(interaction.user.id))
-        await interaction.response.send_message(
-            embed=EmbedBuilder.success(f"Blacklisted {user.mention}\nReason: {reason}")
-        )
+        duration = timedelta(hours=hours) if hours else None
+        db.blacklist_add(str(user.id), reason, str(interaction.user.id), duration)
+        
+        message = f"Blacklisted {user.mention}\nReason: {reason}"
+        if duration:
+            message += f"\nExpires: <t:{int((datetime.now() + duration).timestamp())}:R>"
+        await interaction.response.send_message(embed=EmbedBuilder.success(message))
     
     @app_commands.command(name="unblacklist", description="Remove user from blacklist")
     @app_commands.checks.has_permissions(administrator=True)
     @app_commands.describe(user="User to unblacklist")
+    @timed("command.unblacklist")
     async def blacklist_remove(self, interaction: discord.Interaction, user: discord.Member):
-        if db.blacklist_remove(str(user.id)):
+        if self.bot.dbs.get(interaction.guild_id).blacklist_remove(str(user.id)):
             await interaction.response.send_message(
                 embed=EmbedBuilder.success(f"Removed {user.mention} from blacklist!")
             )
@@ -43,8 +54,10 @@ class Blacklist(commands.Cog):
     
     @app_commands.command(name="blacklistview", description="View blacklisted users")
     @app_commands.checks.has_permissions(administrator=True)
+    @timed("command.blacklistview")
     async def blacklist_view(self, interaction: discord.Interaction):
-        if not db.data['blacklist']:
+        entries = self.bot.dbs.get(interaction.guild_id).get_blacklist()
+        if not entries:
             await interaction.response.send_message(
                 embed=EmbedBuilder.info("No users are blacklisted."),
                 ephemeral=True
@@ -53,15 +66,16 @@ class Blacklist(commands.Cog):
         
         embed = discord.Embed(title="🚫 Blacklisted Users", color=0xDC2626)
         
-        for entry in db.data['blacklist']:
+        for entry in entries:
             user = self.bot.get_user(int(entry['user_id']))
             name = user.mention if user else f"User ID: {entry['user_id']}"
             
-            embed.add_field(
-                name=name,
-                value=f"Reason: {entry['reason']}\nBy: <@{entry['added_by']}>",
-                inline=False
-            )
+            value = f"Reason: {entry['reason']}\nBy: <@{entry['added_by']}>"
+            if entry.get('expires_at'):
+                expires = datetime.fromisoformat(entry['expires_at'])
+                value += f"\nExpires: <t:{int(expires.timestamp())}:R>"
+            
+            embed.add_field(name=name, value=value, inline=False)
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -1,40 +1,120 @@
 import discord
 from discord.ext import commands
+from discord import app_commands
+import asyncio
 import os
 from dotenv import load_dotenv
 
+from utils.database import GuildDatabases
+from utils.startup import StartupTimer, gateway_options, memory_report, sync_if_changed
+
 load_dotenv()
 
-# Configuration
-GUILD_ID = 1437853582161477695
+# Data from before per-guild partitions belongs to the original server,
+# together with the settings that used to be hard-coded
+LEGACY_GUILD_ID = 1437853582161477695
+LEGACY_CONFIG = {
+    'category_id': "1473374359568781403",
+    'staff_role_id': "1441463909155344576",
+    'transcripts_channel_id': "1466878461632315527",
+    'panel_banner_url': "https://cdn.discordapp.com/attachments/1466878461632315527/1475484445564862586/ticketpanl2_1_1.png"
+}
+
+# Sharding: unset, discord.py picks the shard count. Every shard runs in this
+# process, which owns every guild partition
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
 
-class WestBot(commands.Bot):
+class WestBot(commands.AutoShardedBot):
     def __init__(self):
+        # Intents and cache limits come from INTENTS_PROFILE, MAX_MESSAGES
+        # and CHUNK_GUILDS_AT_STARTUP
         super().__init__(
             command_prefix="!",
-            intents=discord.Intents.all(),
-            help_command=None
+            help_command=None,
+            shard_count=SHARD_COUNT,
+            **gateway_options()
         )
+        
+        self.startup = StartupTimer()
+        # One database per guild, injected into every cog; partitions on
+        # disk are loaded in login(), new guilds' on first use
+        self.dbs = GuildDatabases()
+        self._db_loading = None
+    
+    def _load_databases(self):
+        with self.startup.phase("database"):
+            self.dbs.migrate_legacy(LEGACY_GUILD_ID, LEGACY_CONFIG)
+            self.dbs.preload(self.dbs.on_disk())
+    
+    async def login(self, token: str):
+        # Parse the data files on a worker thread while the HTTP login and
+        # application info requests are in flight; setup_hook picks it up
+        self._db_loading = asyncio.create_task(asyncio.to_thread(self._load_databases))
+        self.startup.begin("login")
+        await super().login(token)
     
     async def setup_hook(self):
+        self.startup.end("login")
+        with self.startup.phase("database wait"):
+            await self._db_loading
+        # Start background persistence
+        await self.dbs.start()
+        
         # Load cogs
+        self.startup.begin("extensions")
         await self.load_extension("cogs.tickets")
         await self.load_extension("cogs.stats")
         await self.load_extension("cogs.blacklist")
+        await self.load_extension("cogs.recorder")
         await self.load_extension("cogs.autoresponder")
+        await self.load_extension("cogs.pool")
+        await self.load_extension("cogs.jobs")
+        await self.load_extension("cogs.monitoring")
+        await self.load_extension("cogs.config")
         
-        # Sync commands
-        guild = discord.Object(id=GUILD_ID)
-        self.tree.copy_global_to(guild=guild)
-        await self.tree.sync(guild=guild)
-        
+        # One persistent handler for every panel's select, so panels keep
+        # working after a restart; ticket buttons are routed by custom_id
+        self.add_view(self.get_cog("Tickets").panel_view())
+        self.startup.end("extensions")
         print(f"Loaded {len(self.cogs)} cogs")
-        print(f"Synced commands to guild {GUILD_ID}")
+        
+        # Every command works on a guild's partition, so none are offered in DMs
+        for command in self.tree.get_commands():
+            command.guild_only = True
+        
+        # Sync global commands, only when they changed since the last sync
+        with self.startup.phase("command sync"):
+            synced = await sync_if_changed(self.tree)
+            # Commands used to be registered on the original server only;
+            # syncing its now-empty guild tree removes those copies once,
+            # after which the stored hash matches and this is skipped
+            legacy = discord.Object(id=LEGACY_GUILD_ID)
+            self.tree.clear_commands(guild=legacy)
+            try:
+                await sync_if_changed(self.tree, legacy)
+            except discord.HTTPException as e:
+                # Not fatal; retried on the next start
+                print(f"Could not remove the original server's guild commands: {e}")
+        print("Synced application commands" if synced else "Commands unchanged, skipped sync")
+        self.startup.begin("gateway")
+    
+    async def close(self):
+        await super().close()
+        # The load may still be running if login failed part way
+        if self._db_loading is not None:
+            await self._db_loading
+        # Flush anything still queued before the process exits
+        await self.dbs.close()
     
     async def on_ready(self):
         print(f"🚀 West Ticket Bot is online!")
         print(f"Logged in as: {self.user.name} ({self.user.id})")
-        print(f"Guild: {GUILD_ID}")
+        print(f"Guilds: {len(self.guilds)} on {self.shard_count} shard(s)")
+        # on_ready fires again after reconnects; the breakdown is for boot only
+        if not self.startup.reported:
+            self.startup.end("gateway")
+            print(self.startup.report())
+            print(memory_report(self))
         
         await self.change_presence(
             activity=discord.Activity(
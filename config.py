@@ -0,0 +1,70 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from typing import Optional
+
+from utils.embeds import EmbedBuilder
+from utils.metrics import timed
+
+class GuildConfig(commands.Cog):
+    config = app_commands.Group(name="config", description="Configure the ticket system for this server")
+    
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+    
+    async def _set(self, interaction: discord.Interaction, key: str, value: Optional[str], message: str):
+        db = self.bot.dbs.get(interaction.guild_id)
+        previous = db.get_config().get(key)
+        db.set_config(key, value)
+        self.bot.dispatch("guild_config_changed", interaction.guild_id, key, previous)
+        await interaction.response.send_message(embed=EmbedBuilder.success(message), ephemeral=True)
+    
+    @config.command(name="show", description="Show this server's ticket settings")
+    @app_commands.checks.has_permissions(administrator=True)
+    @timed("command.config_show")
+    async def config_show(self, interaction: discord.Interaction):
+        embed = EmbedBuilder.guild_config(self.bot.dbs.get(interaction.guild_id).get_config())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @config.command(name="category", description="Set the category new tickets are created in")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(category="Category for ticket channels")
+    @timed("command.config_category")
+    async def config_category(self, interaction: discord.Interaction, category: discord.CategoryChannel):
+        await self._set(
+            interaction, 'category_id', str(category.id), f"Tickets will be created in **{category.name}**"
+        )
+    
+    @config.command(name="staffrole", description="Set the role that can see and claim tickets")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(role="Staff role")
+    @timed("command.config_staffrole")
+    async def config_staffrole(self, interaction: discord.Interaction, role: discord.Role):
+        await self._set(interaction, 'staff_role_id', str(role.id), f"Staff role set to {role.mention}")
+    
+    @config.command(name="transcripts", description="Set the channel closed-ticket transcripts are posted to")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(channel="Transcripts channel")
+    @timed("command.config_transcripts")
+    async def config_transcripts(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        await self._set(
+            interaction, 'transcripts_channel_id', str(channel.id), f"Transcripts will go to {channel.mention}"
+        )
+    
+    @config.command(name="banner", description="Set the image shown on the ticket panel")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(url="Image URL; leave empty to remove the banner")
+    @timed("command.config_banner")
+    async def config_banner(self, interaction: discord.Interaction, url: Optional[str] = None):
+        if url and not url.startswith(("https://", "http://")):
+            await interaction.response.send_message(
+                embed=EmbedBuilder.error("The banner must be an http(s) image URL."),
+                ephemeral=True
+            )
+            return
+        await self._set(
+            interaction, 'panel_banner_url', url, "Panel banner updated" if url else "Panel banner removed"
+        )
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(GuildConfig(bot))
@@ -1,34 +1,138 @@
-import json
+import asyncio
 import os
-from datetime import datetime
-from typing import Optional, Dict, List
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Iterable, List, Set, Tuple
+
+from utils.archive import TicketArchive
+from utils.metrics import REGISTRY, SIZE_BUCKETS
+from utils.rollups import RatingAggregate, StatsRollup
+from utils.storage import COLLECTIONS, BackgroundWriter, StorageBackend, create_backend
+
+# How long a burst of mutations may sit in memory before it is written
+FLUSH_DELAY = float(os.getenv("DB_FLUSH_DELAY", "0.5"))
+MAX_STALENESS = float(os.getenv("DB_MAX_STALENESS", "5"))
+
+DB_LOAD_SECONDS = REGISTRY.gauge("west_db_load_seconds", "Time spent loading guild databases")
+DB_LOAD_BYTES = REGISTRY.gauge("west_db_load_bytes", "Size of the guild data directories loaded")
+DB_FLUSH_SECONDS = REGISTRY.histogram("west_db_flush_seconds", "Time taken by one background flush")
+DB_FLUSH_BYTES = REGISTRY.histogram("west_db_flush_bytes", "Bytes written by one background flush", buckets=SIZE_BUCKETS)
+
+# Per-guild settings, edited with /config; unset until an admin sets them
+GUILD_SETTINGS = ('category_id', 'staff_role_id', 'transcripts_channel_id', 'panel_banner_url')
+
+# What a data directory held before it was split into guild partitions
+LEGACY_FILES = [f"{col}.json" for col in COLLECTIONS] + [
+    'snapshot.json', 'journal.log', 'tickets.db', 'tickets.db-wal', 'tickets.db-shm', 'archive'
+]
 
 class TicketDatabase:
-    def __init__(self):
-        self.files = {
-            'tickets': 'data/tickets.json',
-            'stats': 'data/stats.json',
-            'blacklist': 'data/blacklist.json',
-            'ratings': 'data/ratings.json'
-        }
-        self._ensure_data_dir()
-        self.data = {key: self._load_file(path) for key, path in self.files.items()}
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend = backend or create_backend()
+        # In-memory cache is the source of truth: the backend is read once
+        # here and only receives the mutations afterwards.
+        started = time.perf_counter()
+        self.data = self.backend.load()
+        # Summed over every guild partition this process opens
+        DB_LOAD_SECONDS.labels().inc(time.perf_counter() - started)
+        DB_LOAD_BYTES.labels().inc(sum(
+            entry.stat().st_size for entry in os.scandir(self.backend.data_dir) if entry.is_file()
+        ))
+        self._migrate_blacklist()
+        self.archive = TicketArchive(os.path.join(self.backend.data_dir, 'archive'))
+        self._archive_closed_tickets()
+        self.rollups = StatsRollup(self.data['rollups'])
+        self._backfill_rollups()
+        self.rating_summary = RatingAggregate(self.data['aggregates'].setdefault('ratings', {}))
+        self._backfill_rating_summary()
         self.ticket_counter = self._get_last_ticket_number()
+        
+        # Secondary indexes over the cache, kept in step by every mutation
+        self._by_channel: Dict[str, str] = {}
+        self._open_by_user: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        # Every ticket per user, and per user and type, oldest first
+        self._by_user: Dict[str, List[str]] = {}
+        self._by_user_type: Dict[Tuple[str, str], List[str]] = {}
+        self._rebuild_indexes()
+        
+        # Bumped whenever stats or ratings change; keys for cached embeds
+        self.versions: Dict[str, int] = {'stats': 0, 'ratings': 0}
+        
+        # Users with a ticket creation in flight
+        self._opening: Set[str] = set()
+        
+        self.writer = BackgroundWriter(self._flush, FLUSH_DELAY, MAX_STALENESS)
+    
+    async def start(self):
+        self.writer.start()
     
-    def _ensure_data_dir(self):
-        os.makedirs('data', exist_ok=True)
-        for path in self.files.values():
-            if not os.path.exists(path):
-                with open(path, 'w') as f:
-                    json.dump({} if 'blacklist' not in path else [], f)
+    async def close(self):
+        await self.writer.close()
+        self.backend.close()
     
-    def _load_file(self, path: str):
-        with open(path, 'r') as f:
-            return json.load(f)
+    def _flush(self):
+        started = time.perf_counter()
+        written = self.backend.bytes_written
+        # Archive first: the hot set drops transcripts once they are archived
+        self.archive.flush()
+        self.backend.flush()
+        DB_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        DB_FLUSH_BYTES.observe(self.backend.bytes_written - written)
     
-    def _save_file(self, key: str):
-        with open(self.files[key], 'w') as f:
-            json.dump(self.data[key], f, indent=2, default=str)
+    def _commit(self):
+        # Outside the bot (scripts, migrations) there is no loop to defer to
+        if self.writer.running:
+            self.writer.mark_dirty()
+        else:
+            self._flush()
+    
+    def _migrate_blacklist(self):
+        # Older files stored the blacklist as a list of entries
+        if isinstance(self.data['blacklist'], list):
+            self.data['blacklist'] = {entry['user_id']: entry for entry in self.data['blacklist']}
+            self.backend.replace('blacklist', self.data['blacklist'])
+            self.backend.flush()
+    
+    def _archive_closed_tickets(self):
+        # Closed tickets from before the archive tier still carry transcripts
+        closed = [t for t in self.data['tickets'].values() if t["status"] == "closed" and "archive" not in t]
+        for ticket in closed:
+            self._move_to_archive(ticket)
+        if closed:
+            self._flush()
+    
+    def _move_to_archive(self, ticket: Dict):
+        month = TicketArchive.month_of(ticket)
+        self.archive.store(month, ticket)
+        summary = {k: v for k, v in ticket.items() if k != "transcript"}
+        summary["archive"] = month
+        self.data['tickets'][ticket["id"]] = summary
+        self.backend.put('tickets', ticket["id"], summary)
+    
+    def _backfill_rollups(self):
+        if self.data['rollups'] or not self.data['tickets']:
+            return
+        self.rollups.backfill(self.data['tickets'].values(), self.data['ratings'])
+        for key, bucket in self.data['rollups'].items():
+            self.backend.put('rollups', key, bucket)
+        self.backend.flush()
+    
+    def _backfill_rating_summary(self):
+        if self.rating_summary.data['count'] or not self.data['ratings']:
+            return
+        for ticket_id, rating in self.data['ratings'].items():
+            ticket = self.data['tickets'].get(ticket_id) or {}
+            self.rating_summary.add(int(rating['stars']), ticket.get('claimed_by'))
+        self.backend.put('aggregates', 'ratings', self.rating_summary.data)
+        self.backend.flush()
+    
+    def _persist_rollups(self, touched: List[str], expired: List[str]):
+        self.versions['stats'] += 1
+        for key in touched:
+            self.backend.put('rollups', key, self.data['rollups'][key])
+        for key in expired:
+            self.backend.delete('rollups', key)
     
     def _get_last_ticket_number(self) -> int:
         tickets = self.data['tickets']
@@ -37,12 +141,59 @@ class TicketDatabase:
         numbers = [int(tid.split('-')[1]) for tid in tickets.keys() if tid.startswith('ticket-')]
         return max(numbers) if numbers else 0
     
+    def _rebuild_indexes(self):
+        self._by_channel.clear()
+        self._open_by_user.clear()
+        self._by_status.clear()
+        self._by_user.clear()
+        self._by_user_type.clear()
+        for ticket in sorted(self.data['tickets'].values(), key=lambda t: t["created_at"]):
+            self._index_ticket(ticket)
+            self._index_history(ticket)
+    
+    def _index_history(self, ticket: Dict):
+        # Append-only, so a position in these lists is a stable page cursor
+        self._by_user.setdefault(ticket["user_id"], []).append(ticket["id"])
+        self._by_user_type.setdefault((ticket["user_id"], ticket["type"]), []).append(ticket["id"])
+    
+    def _index_ticket(self, ticket: Dict):
+        if ticket.get("channel_id"):
+            self._by_channel[str(ticket["channel_id"])] = ticket["id"]
+        self._by_status.setdefault(ticket["status"], set()).add(ticket["id"])
+        if ticket["status"] == "open":
+            self._open_by_user.setdefault(ticket["user_id"], set()).add(ticket["id"])
+    
+    def _unindex_status(self, ticket: Dict):
+        self._by_status.get(ticket["status"], set()).discard(ticket["id"])
+        if ticket["status"] == "open":
+            open_ids = self._open_by_user.get(ticket["user_id"])
+            if open_ids is not None:
+                open_ids.discard(ticket["id"])
+                if not open_ids:
+                    del self._open_by_user[ticket["user_id"]]
+    
     # Tickets
-    def create_ticket(self, user_id: str, channel_id: str, ticket_type: str) -> str:
+    def reserve_ticket_id(self) -> str:
+        # Handed out before any await, so concurrent opens never share an ID;
+        # an ID whose channel creation fails is simply skipped
         self.ticket_counter += 1
-        ticket_id = f"ticket-{self.ticket_counter:04d}"
+        return f"ticket-{self.ticket_counter:04d}"
+    
+    def begin_ticket_open(self, user_id: str, max_open: int = 1) -> bool:
+        # Check-and-set with no await in between: a double click or a second
+        # panel cannot slip past the limit while the first open is in flight
+        if user_id in self._opening or len(self._open_by_user.get(user_id, ())) >= max_open:
+            return False
+        self._opening.add(user_id)
+        return True
+    
+    def end_ticket_open(self, user_id: str):
+        self._opening.discard(user_id)
+    
+    def create_ticket(self, user_id: str, channel_id: str, ticket_type: str, ticket_id: Optional[str] = None) -> str:
+        ticket_id = ticket_id or self.reserve_ticket_id()
         
-        self.data['tickets'][ticket_id] = {
+        ticket = {
             "id": ticket_id,
             "user_id": user_id,
             "channel_id": channel_id,
@@ -56,80 +207,263 @@ class TicketDatabase:
             "rating": None,
             "transcript": []
         }
-        self._save_file('tickets')
+        self.data['tickets'][ticket_id] = ticket
+        self._index_ticket(ticket)
+        self._index_history(ticket)
+        self.backend.put('tickets', ticket_id, ticket)
         self._update_stats('tickets_created', ticket_type)
+        self._commit()
         return ticket_id
     
     def get_ticket(self, ticket_id: str) -> Optional[Dict]:
+        # Closed tickets are summaries without their transcript
         return self.data['tickets'].get(ticket_id)
     
+    async def get_ticket_details(self, ticket_id: str) -> Optional[Dict]:
+        ticket = self.get_ticket(ticket_id)
+        if not ticket or "archive" not in ticket:
+            return ticket
+        archived = await asyncio.to_thread(self.archive.load, ticket["archive"], ticket_id)
+        # The summary is newer (e.g. a rating submitted after closing)
+        return {**archived, **ticket} if archived else ticket
+    
+    def get_ticket_by_channel(self, channel_id) -> Optional[Dict]:
+        ticket_id = self._by_channel.get(str(channel_id))
+        return self.data['tickets'].get(ticket_id) if ticket_id else None
+    
     def get_user_tickets(self, user_id: str) -> Dict[str, Dict]:
-        return {k: v for k, v in self.data['tickets'].items() 
-                if v["user_id"] == user_id and v["status"] == "open"}
+        return {tid: self.data['tickets'][tid] for tid in self._open_by_user.get(user_id, ())}
+    
+    def get_user_ticket_page(self, user_id: str, cursor: Optional[int] = None, limit: int = 10,
+                             status: Optional[str] = None, ticket_type: Optional[str] = None
+                             ) -> Tuple[List[Dict], Optional[int]]:
+        # Newest first, starting at `cursor` (None for the newest). Returns the
+        # page and the cursor of the next one, or None on the last page.
+        if status == 'open':
+            ids = sorted(self._open_by_user.get(user_id, ()), key=lambda tid: self.data['tickets'][tid]["created_at"])
+        elif ticket_type:
+            ids = self._by_user_type.get((user_id, ticket_type), [])
+        else:
+            ids = self._by_user.get(user_id, [])
+        
+        # Only open tickets (a handful per user) can be skipped by the
+        # filters, so a page costs O(limit) whatever the history length
+        position = len(ids) - 1 if cursor is None else min(cursor, len(ids) - 1)
+        page, positions = [], []
+        while position >= 0 and len(page) <= limit:
+            ticket = self.data['tickets'][ids[position]]
+            if (not status or ticket["status"] == status) and (not ticket_type or ticket["type"] == ticket_type):
+                page.append(ticket)
+                positions.append(position)
+            position -= 1
+        
+        if len(page) > limit:
+            return page[:limit], positions[limit]
+        return page, None
+    
+    def get_tickets_by_status(self, status: str) -> Dict[str, Dict]:
+        return {tid: self.data['tickets'][tid] for tid in self._by_status.get(status, ())}
+    
+    def count_tickets(self, status: str) -> int:
+        return len(self._by_status.get(status, ()))
     
     def claim_ticket(self, ticket_id: str, staff_id: str) -> bool:
         if ticket_id in self.data['tickets']:
-            self.data['tickets'][ticket_id]["claimed_by"] = staff_id
-            self.data['tickets'][ticket_id]["claimed_at"] = datetime.now().isoformat()
-            self._save_file('tickets')
+            ticket = self.data['tickets'][ticket_id]
+            now = datetime.now()
+            if not ticket.get("claimed_by"):
+                waited = (now - datetime.fromisoformat(ticket["created_at"])).total_seconds()
+                self._persist_rollups(*self.rollups.record_duration('time_to_claim', waited, now))
+            
+            fields = {"claimed_by": staff_id, "claimed_at": now.isoformat()}
+            ticket.update(fields)
+            self.backend.update('tickets', ticket_id, fields)
+            self._commit()
             return True
         return False
     
     def close_ticket(self, ticket_id: str, closer_id: str) -> Optional[Dict]:
         if ticket_id in self.data['tickets']:
             ticket = self.data['tickets'][ticket_id]
-            ticket["status"] = "closed"
-            ticket["closed_by"] = closer_id
-            ticket["closed_at"] = datetime.now().isoformat()
-            self._save_file('tickets')
+            now = datetime.now()
+            if ticket["status"] == "open":
+                lifetime = (now - datetime.fromisoformat(ticket["created_at"])).total_seconds()
+                self._persist_rollups(*self.rollups.record_duration('time_to_close', lifetime, now))
+            
+            fields = {"status": "closed", "closed_by": closer_id, "closed_at": now.isoformat()}
+            self._unindex_status(ticket)
+            ticket.update(fields)
+            self._index_ticket(ticket)
+            if "archive" in ticket:
+                self.backend.update('tickets', ticket_id, fields)
+            else:
+                self._move_to_archive(ticket)
             self._update_stats('tickets_closed', ticket['type'])
+            self._commit()
             return ticket
         return None
     
     def add_transcript_message(self, ticket_id: str, author: str, content: str, attachments: List[str] = None):
-        if ticket_id in self.data['tickets']:
-            self.data['tickets'][ticket_id]["transcript"].append({
+        if "transcript" in self.data['tickets'].get(ticket_id, {}):
+            message = {
                 "author": author,
                 "content": content,
                 "timestamp": datetime.now().isoformat(),
                 "attachments": attachments or []
-            })
-            self._save_file('tickets')
+            }
+            self.add_transcript_messages(ticket_id, [message])
+    
+    def add_transcript_messages(self, ticket_id: str, messages: List[Dict]):
+        ticket = self.data['tickets'].get(ticket_id)
+        if not ticket or "transcript" not in ticket:
+            return
+        ticket["transcript"].extend(messages)
+        for message in messages:
+            self.backend.append('tickets', ticket_id, 'transcript', message)
+        self._commit()
     
     def add_rating(self, ticket_id: str, rating: int, feedback: str = None):
         if ticket_id in self.data['tickets']:
-            self.data['tickets'][ticket_id]["rating"] = {
+            ticket = self.data['tickets'][ticket_id]
+            entry = {
                 "stars": rating,
                 "feedback": feedback,
                 "rated_at": datetime.now().isoformat()
             }
-            self._save_file('tickets')
+            
+            # Running aggregates, so reads never rescan the ratings
+            previous = self.data['ratings'].get(ticket_id)
+            if previous:
+                self.rating_summary.remove(int(previous['stars']), ticket.get("claimed_by"))
+            self.rating_summary.add(rating, ticket.get("claimed_by"))
+            self.backend.put('aggregates', 'ratings', self.rating_summary.data)
+            self.versions['ratings'] += 1
+            
+            ticket["rating"] = entry
+            self.backend.update('tickets', ticket_id, {"rating": entry})
             
             # Save to ratings collection
-            self.data['ratings'][ticket_id] = self.data['tickets'][ticket_id]["rating"]
-            self._save_file('ratings')
+            self.data['ratings'][ticket_id] = entry
+            self.backend.put('ratings', ticket_id, entry)
             self._update_stats('ratings', str(rating))
+            
+            # Everything above goes out in one flush
+            self._commit()
+    
+    # Auto-responder triggers
+    def get_triggers(self) -> Dict[str, Dict]:
+        return self.data['triggers']
+    
+    def add_trigger(self, kind: str, pattern: str, response: str, by: str, cooldown: int,
+                    ticket_types: Optional[List[str]] = None) -> str:
+        trigger_id = str(max((int(k) for k in self.data['triggers']), default=0) + 1)
+        rule = {
+            "id": trigger_id,
+            "kind": kind,
+            "pattern": pattern,
+            "response": response,
+            "ticket_types": ticket_types or [],
+            "cooldown": cooldown,
+            "added_by": by,
+            "added_at": datetime.now().isoformat()
+        }
+        self.data['triggers'][trigger_id] = rule
+        self.backend.put('triggers', trigger_id, rule)
+        self._commit()
+        return trigger_id
+    
+    def remove_trigger(self, trigger_id: str) -> bool:
+        if self.data['triggers'].pop(trigger_id, None) is None:
+            return False
+        self.backend.delete('triggers', trigger_id)
+        self._commit()
+        return True
+    
+    # Background jobs
+    def add_job(self, job: Dict) -> bool:
+        if job["id"] in self.data['jobs']:
+            return False
+        self.data['jobs'][job["id"]] = job
+        self.backend.put('jobs', job["id"], job)
+        self._commit()
+        return True
+    
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        return self.data['jobs'].get(job_id)
+    
+    def get_jobs(self) -> Dict[str, Dict]:
+        return self.data['jobs']
+    
+    def update_job(self, job_id: str, fields: Dict):
+        job = self.data['jobs'].get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        self.backend.put('jobs', job_id, job)
+        self._commit()
+    
+    def remove_job(self, job_id: str):
+        if self.data['jobs'].pop(job_id, None) is not None:
+            self.backend.delete('jobs', job_id)
+            self._commit()
+    
+    # Guild settings
+    def get_config(self) -> Dict[str, Optional[str]]:
+        return {key: self.data['config'].get(key) for key in GUILD_SETTINGS}
+    
+    def get_config_id(self, key: str) -> Optional[int]:
+        value = self.data['config'].get(key)
+        return int(value) if value else None
+    
+    def set_config(self, key: str, value: Optional[str]):
+        if value is None:
+            if self.data['config'].pop(key, None) is None:
+                return
+            self.backend.delete('config', key)
+        else:
+            self.data['config'][key] = value
+            self.backend.put('config', key, value)
+        self._commit()
     
     # Blacklist
     def is_blacklisted(self, user_id: str) -> bool:
-        return user_id in self.data['blacklist']
+        entry = self.data['blacklist'].get(user_id)
+        if entry is None:
+            return False
+        if self._is_expired(entry):
+            # Timed entries are swept lazily, on the first lookup after expiry
+            self.blacklist_remove(user_id)
+            return False
+        return True
+    
+    def _is_expired(self, entry: Dict) -> bool:
+        expires_at = entry.get("expires_at")
+        return expires_at is not None and datetime.fromisoformat(expires_at) <= datetime.now()
     
-    def blacklist_add(self, user_id: str, reason: str, by: str):
-        self.data['blacklist'].append({
+    def get_blacklist(self) -> List[Dict]:
+        for user_id in [k for k, v in self.data['blacklist'].items() if self._is_expired(v)]:
+            self.blacklist_remove(user_id)
+        return list(self.data['blacklist'].values())
+    
+    def blacklist_add(self, user_id: str, reason: str, by: str, duration: Optional[timedelta] = None):
+        now = datetime.now()
+        entry = {
             "user_id": user_id,
             "reason": reason,
             "added_by": by,
-            "added_at": datetime.now().isoformat()
-        })
-        self._save_file('blacklist')
+            "added_at": now.isoformat(),
+            "expires_at": (now + duration).isoformat() if duration else None
+        }
+        self.data['blacklist'][user_id] = entry
+        self.backend.put('blacklist', user_id, entry)
+        self._commit()
     
     def blacklist_remove(self, user_id: str) -> bool:
-        original_len = len(self.data['blacklist'])
-        self.data['blacklist'] = [u for u in self.data['blacklist'] if u['user_id'] != user_id]
-        if len(self.data['blacklist']) < original_len:
-            self._save_file('blacklist')
-            return True
-        return False
+        if self.data['blacklist'].pop(user_id, None) is None:
+            return False
+        self.backend.delete('blacklist', user_id)
+        self._commit()
+        return True
     
     # Stats
     def _update_stats(self, metric: str, category: str):
@@ -138,11 +472,113 @@ class TicketDatabase:
         if category not in self.data['stats'][metric]:
             self.data['stats'][metric][category] = 0
         self.data['stats'][metric][category] += 1
-        self._save_file('stats')
+        self.backend.put('stats', metric, self.data['stats'][metric])
+        self._persist_rollups(*self.rollups.record(metric, category, datetime.now()))
     
     def get_stats(self) -> Dict:
         return self.data['stats']
     
+    def stats_version(self, period: str = 'all') -> tuple:
+        return self.versions['stats'], self.versions['ratings'], self.rollups.period_anchor(period)
+    
+    def get_period_stats(self, period: str = 'all') -> Dict:
+        summary = self.rollups.summary(period)
+        if period == 'all':
+            # Lifetime counters predate the rollups, so they stay authoritative
+            for metric in ('tickets_created', 'tickets_closed', 'ratings'):
+                summary[metric] = dict(self.data['stats'].get(metric, {}))
+            summary['average_rating'] = self.get_average_rating()
+            summary['recent_rating'] = self.get_recent_average_rating()
+        else:
+            ratings = summary['ratings']
+            count = sum(ratings.values())
+            summary['average_rating'] = sum(int(k) * v for k, v in ratings.items()) / count if count else 0
+        return summary
+    
     def get_average_rating(self) -> float:
-        ratings = [r['stars'] for r in self.data['ratings'].values()]
-        return sum(ratings) / len(ratings) if ratings else 0
+        return self.rating_summary.average
+    
+    def get_recent_average_rating(self) -> float:
+        return self.rating_summary.recent_average
+    
+    def get_staff_ratings(self) -> Dict[str, Dict]:
+        return self.rating_summary.staff_averages()
+
+class GuildDatabases:
+    """One TicketDatabase per guild under data/guilds/<id>, each with its
+    own files, ticket counter and background writer.
+    
+    A partition opens the first time its guild is used; preload() opens
+    known ones ahead of time.
+    """
+    
+    def __init__(self, root: str = 'data', databases: Optional[Dict[int, TicketDatabase]] = None):
+        self.root = root
+        self._databases: Dict[int, TicketDatabase] = dict(databases or {})
+        self._started = False
+    
+    def path(self, guild_id: int) -> str:
+        return os.path.join(self.root, 'guilds', str(guild_id))
+    
+    def on_disk(self) -> List[int]:
+        guilds_dir = os.path.join(self.root, 'guilds')
+        if not os.path.isdir(guilds_dir):
+            return []
+        return [int(name) for name in os.listdir(guilds_dir) if name.isdigit()]
+    
+    def _open(self, guild_id: int) -> TicketDatabase:
+        return TicketDatabase(create_backend(data_dir=self.path(guild_id)))
+    
+    def preload(self, guild_ids: Iterable[int]):
+        # Blocking; meant for a worker thread before the bot starts
+        for guild_id in guild_ids:
+            if guild_id not in self._databases:
+                self._databases[guild_id] = self._open(guild_id)
+    
+    def migrate_legacy(self, guild_id: int, config: Dict[str, str]) -> bool:
+        # A data directory from before partitions belongs to a single guild:
+        # move it into that guild's partition along with its settings, once
+        legacy = [name for name in LEGACY_FILES if os.path.exists(os.path.join(self.root, name))]
+        target = self.path(guild_id)
+        if not legacy or os.path.exists(target):
+            return False
+        
+        os.makedirs(target)
+        for name in legacy:
+            os.replace(os.path.join(self.root, name), os.path.join(target, name))
+        db = self._databases[guild_id] = self._open(guild_id)
+        for key, value in config.items():
+            db.set_config(key, value)
+        return True
+    
+    def get(self, guild_id: int) -> TicketDatabase:
+        guild_id = int(guild_id)
+        db = self._databases.get(guild_id)
+        if db is None:
+            db = self._databases[guild_id] = self._open(guild_id)
+            if self._started:
+                db.writer.start()
+        return db
+    
+    def find(self, guild_id: int) -> Optional[TicketDatabase]:
+        # Loaded partitions only: everything on disk was preloaded, so a
+        # guild missing here has no tickets
+        return self._databases.get(int(guild_id))
+    
+    def items(self):
+        return self._databases.items()
+    
+    def values(self):
+        return self._databases.values()
+    
+    def __len__(self) -> int:
+        return len(self._databases)
+    
+    async def start(self):
+        self._started = True
+        for db in self._databases.values():
+            await db.start()
+    
+    async def close(self):
+        for db in self._databases.values():
+            await db.close()
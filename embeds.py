@@ -1,5 +1,7 @@
 import discord
+from collections import OrderedDict
 from datetime import datetime
+from typing import Callable, Dict, Hashable
 
 # Colors
 PRIMARY_COLOR = 0xDC2626      # Red
@@ -8,9 +10,82 @@ WARNING_COLOR = 0xF59E0B      # Yellow
 ERROR_COLOR = 0xEF4444        # Red error
 INFO_COLOR = 0x3B82F6         # Blue
 
+def format_duration(seconds: float) -> str:
+    if seconds is None:
+        return "—"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 86400:.1f}d"
+
+PANEL_CATEGORIES = (
+    "🛠️ **Support** — General help & assistance\n"
+    "🛒 **Order** — Purchase our services\n"
+    "👔 **Staff Application** — Join our team\n"
+    "💰 **Refund** — Request a refund"
+)
+
+WELCOME_EMOJIS = {
+    'support': '🛠️',
+    'order': '🛒',
+    'staff': '👔',
+    'refund': '💰'
+}
+
+WELCOME_MESSAGES = {
+    'support': "Welcome! How can we help you today?",
+    'order': "Welcome! Please describe what you'd like to purchase.",
+    'staff': "Welcome! Please tell us about yourself and why you want to join.",
+    'refund': "Welcome! Please provide your order details and reason for refund."
+}
+
+class EmbedCache:
+    # Built embeds keyed on what they were built from, usually a database
+    # version counter, so an unchanged embed is a dict lookup. Callers share
+    # the cached object and must not modify it.
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, discord.Embed]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable, build: Callable[[], discord.Embed]) -> discord.Embed:
+        embed = self._entries.get(key)
+        if embed is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return embed
+        
+        self.misses += 1
+        embed = self._entries[key] = build()
+        # Superseded versions are never asked for again and age out here
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return embed
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+embed_cache = EmbedCache()
+
 class EmbedBuilder:
     @staticmethod
-    def ticket_panel(banner_url: str = None) -> discord.Embed:
+    def ticket_panel(banner_url: str = None, avg_rating: float = None) -> discord.Embed:
+        rating = f"{avg_rating:.1f}/5" if avg_rating else "No ratings yet"
+        # Only the rating line ever changes
+        return embed_cache.get(
+            ("panel", banner_url, rating),
+            lambda: EmbedBuilder._build_ticket_panel(banner_url, rating)
+        )
+    
+    @staticmethod
+    def _build_ticket_panel(banner_url: str, rating: str) -> discord.Embed:
         embed = discord.Embed(
             title="🎫 West Services • Support System",
             description=(
@@ -19,22 +94,13 @@ class EmbedBuilder:
                 "Select a category below to create your ticket.\n\n"
                 "⏱️ **Response Time:** 5-20 minutes\n"
                 "🕐 **Available:** 24/7\n"
-                "⭐ **Average Rating:** 4.8/5"
+                f"⭐ **Average Rating:** {rating}"
             ),
             color=PRIMARY_COLOR,
             timestamp=datetime.now()
         )
         
-        embed.add_field(
-            name="📋 Categories",
-            value=(
-                "🛠️ **Support** — General help & assistance\n"
-                "🛒 **Order** — Purchase our services\n"
-                "👔 **Staff Application** — Join our team\n"
-                "💰 **Refund** — Request a refund"
-            ),
-            inline=False
-        )
+        embed.add_field(name="📋 Categories", value=PANEL_CATEGORIES, inline=False)
         
         embed.set_image(url=banner_url) if banner_url else None
         embed.set_footer(text="West Services • Premium Quality", icon_url=None)
@@ -42,24 +108,25 @@ class EmbedBuilder:
         return embed
     
     @staticmethod
-    def ticket_welcome(ticket_type: str, ticket_info: dict, user: discord.Member) -> discord.Embed:
-        emojis = {
-            'support': '🛠️',
-            'order': '🛒',
-            'staff': '👔',
-            'refund': '💰'
-        }
-        
-        messages = {
-            'support': "Welcome! How can we help you today?",
-            'order': "Welcome! Please describe what you'd like to purchase.",
-            'staff': "Welcome! Please tell us about yourself and why you want to join.",
-            'refund': "Welcome! Please provide your order details and reason for refund."
-        }
+    def staff_ratings(staff: dict) -> discord.Embed:
+        embed = discord.Embed(
+            title="⭐ West Services • Staff Ratings",
+            color=PRIMARY_COLOR,
+            timestamp=datetime.now()
+        )
         
+        ranked = sorted(staff.items(), key=lambda x: (x[1]['average'], x[1]['count']), reverse=True)
+        embed.description = "\n".join([
+            f"<@{staff_id}> — **{s['average']:.2f}/5** ({s['count']} ratings)" for staff_id, s in ranked[:25]
+        ]) if ranked else "No ratings yet"
+        
+        return embed
+    
+    @staticmethod
+    def ticket_welcome(ticket_type: str, ticket_info: dict, user: discord.Member) -> discord.Embed:
         embed = discord.Embed(
-            title=f"{emojis.get(ticket_type, '🎫')} {ticket_info['label']} Ticket",
-            description=messages.get(ticket_type, "How can we help?"),
+            title=f"{WELCOME_EMOJIS.get(ticket_type, '🎫')} {ticket_info['label']} Ticket",
+            description=WELCOME_MESSAGES.get(ticket_type, "How can we help?"),
             color=PRIMARY_COLOR,
             timestamp=datetime.now()
         )
@@ -84,9 +151,9 @@ class EmbedBuilder:
         return discord.Embed(title=title, description=message, color=INFO_COLOR)
     
     @staticmethod
-    def stats(stats_data: dict, avg_rating: float) -> discord.Embed:
+    def stats(stats_data: dict, avg_rating: float, period_label: str = None) -> discord.Embed:
         embed = discord.Embed(
-            title="📊 West Services • Statistics",
+            title="📊 West Services • Statistics" + (f" • {period_label}" if period_label else ""),
             color=PRIMARY_COLOR,
             timestamp=datetime.now()
         )
@@ -115,12 +182,126 @@ class EmbedBuilder:
         
         # Ratings
         ratings = stats_data.get('ratings', {})
+        recent = stats_data.get('recent_rating')
         embed.add_field(
             name="⭐ Ratings",
-            value=f"**Average:** {avg_rating:.1f}/5\n" + "\n".join([
+            value=f"**Average:** {avg_rating:.1f}/5\n"
+            + (f"**Recent:** {recent:.1f}/5\n" if recent else "") + "\n".join([
                 f"{'⭐' * int(k)}: {v}" for k, v in sorted(ratings.items(), key=lambda x: int(x[0]))
             ]) if ratings else "No ratings yet",
             inline=True
         )
         
+        # Response times
+        claim = stats_data.get('time_to_claim')
+        close = stats_data.get('time_to_close')
+        if claim or close:
+            lines = []
+            for label, timing in (("Claim", claim), ("Resolve", close)):
+                if timing and timing['count']:
+                    lines.append(
+                        f"**{label}:** median {format_duration(timing['p50'])} • "
+                        f"p90 {format_duration(timing['p90'])}"
+                    )
+            embed.add_field(
+                name="⏱️ Response Times",
+                value="\n".join(lines) if lines else "No data",
+                inline=False
+            )
+        
+        return embed
+    
+    @staticmethod
+    def latency(report: dict, cache: dict = None) -> discord.Embed:
+        embed = discord.Embed(
+            title="⚡ West Services • Latency",
+            color=INFO_COLOR,
+            timestamp=datetime.now()
+        )
+        
+        if not report:
+            embed.description = "No samples yet."
+        for name, summary in report.items():
+            if not summary['count']:
+                continue
+            embed.add_field(
+                name=name,
+                value=(
+                    f"**p50:** {summary['p50'] * 1000:.0f}ms • **p99:** {summary['p99'] * 1000:.0f}ms\n"
+                    f"**Max:** {summary['max'] * 1000:.0f}ms • {summary['count']} samples"
+                ),
+                inline=False
+            )
+        
+        if cache:
+            lookups = cache['hits'] + cache['misses']
+            embed.add_field(
+                name="Embed cache",
+                value=(
+                    f"**Hits:** {cache['hits']} • **Misses:** {cache['misses']}"
+                    + (f" ({cache['hits'] / lookups:.0%} hit rate)" if lookups else "")
+                    + f"\n{cache['size']} embeds cached"
+                ),
+                inline=False
+            )
+        
+        return embed
+    
+    @staticmethod
+    def triggers(rules: list) -> discord.Embed:
+        embed = discord.Embed(
+            title="🤖 West Services • Auto-Responder Triggers",
+            color=INFO_COLOR
+        )
+        
+        if not rules:
+            embed.description = "No triggers configured."
+        for rule in rules[:25]:
+            types = ", ".join(t.capitalize() for t in rule.get('ticket_types') or []) or "All tickets"
+            response = rule['response'] if len(rule['response']) <= 200 else rule['response'][:197] + "..."
+            embed.add_field(
+                name=f"#{rule['id']} • {rule['kind']} • {rule['pattern'][:80]}",
+                value=f"{response}\n*{types} • cooldown {format_duration(rule.get('cooldown', 0))}*",
+                inline=False
+            )
+        
+        return embed
+    
+    @staticmethod
+    def guild_config(config: dict) -> discord.Embed:
+        embed = discord.Embed(
+            title="⚙️ West Services • Configuration",
+            description="Change a setting with `/config <setting>`.",
+            color=INFO_COLOR
+        )
+        
+        category = config.get('category_id')
+        role = config.get('staff_role_id')
+        transcripts = config.get('transcripts_channel_id')
+        embed.add_field(name="📁 Category", value=f"<#{category}>" if category else "Not set", inline=True)
+        embed.add_field(name="👔 Staff Role", value=f"<@&{role}>" if role else "Not set", inline=True)
+        embed.add_field(name="📝 Transcripts", value=f"<#{transcripts}>" if transcripts else "Not set", inline=True)
+        embed.add_field(name="🖼️ Panel Banner", value=config.get('panel_banner_url') or "None", inline=False)
+        
+        return embed
+    
+    @staticmethod
+    def ticket_history(tickets: list, page: int, filters: str = None) -> discord.Embed:
+        embed = discord.Embed(
+            title="🎫 Your Ticket History" + (f" • {filters}" if filters else ""),
+            color=PRIMARY_COLOR
+        )
+        
+        for ticket in tickets:
+            status = "🟢 Open" if ticket['status'] == 'open' else "🔒 Closed"
+            rating = f"⭐ {ticket['rating']['stars']}/5" if ticket.get('rating') else "Not rated"
+            opened = int(datetime.fromisoformat(ticket['created_at']).timestamp())
+            
+            embed.add_field(
+                name=f"{ticket['id']} • {ticket['type'].capitalize()}",
+                value=f"Status: {status} | Rating: {rating} | Opened <t:{opened}:R>",
+                inline=False
+            )
+        
+        embed.set_footer(text=f"Page {page} • Newest first")
         return embed
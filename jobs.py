@@ -0,0 +1,203 @@
+import discord
+from discord.ext import commands
+import asyncio
+import os
+import traceback
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from cogs.tickets import TICKET_TYPES, RatingView
+from utils.embeds import SUCCESS_COLOR
+from utils.transcript import render_transcript, transcript_filename, transcript_formats
+
+# Closing a ticket is a durable job of discrete steps. Steps whose
+# dependencies are done run concurrently; failures retry with exponential
+# backoff, and unfinished jobs are picked up again on startup.
+STEPS = {
+    'archive': (),
+    'upload': ('archive',),
+    'notify': ('archive',),
+    'delete': ('archive',)
+}
+CLOSE_WORKERS = int(os.getenv("CLOSE_WORKERS", "4"))
+DELETE_DELAY = 5
+MAX_ATTEMPTS = 6
+RETRY_BASE = 5
+RETRY_MAX = 600
+
+class CloseQueue(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # Jobs live in their guild's partition and are queued as (guild ID, job ID)
+        self._queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._timers: Dict[Tuple[int, str], asyncio.TimerHandle] = {}
+    
+    async def cog_load(self):
+        # Resume whatever was in flight when the bot last stopped
+        for guild_id, db in self.bot.dbs.items():
+            for job_id in db.get_jobs():
+                self._queue.put_nowait((guild_id, job_id))
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(CLOSE_WORKERS)]
+    
+    async def cog_unload(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        for worker in self._workers:
+            worker.cancel()
+    
+    def enqueue_close(self, ticket_id: str, guild_id: int, channel_id: int, closed_by: str) -> bool:
+        now = datetime.now()
+        job = {
+            "id": f"close:{ticket_id}",
+            "ticket_id": ticket_id,
+            "guild_id": str(guild_id),
+            "channel_id": str(channel_id),
+            "closed_by": closed_by,
+            "created_at": now.isoformat(),
+            "steps": {
+                step: {"state": "pending", "attempts": 0, "due": now.isoformat(), "error": None}
+                for step in STEPS
+            }
+        }
+        # Give people a moment to read the closing notice
+        job["steps"]["delete"]["due"] = (now + timedelta(seconds=DELETE_DELAY)).isoformat()
+        
+        if not self.bot.dbs.get(guild_id).add_job(job):
+            return False
+        self._queue.put_nowait((int(guild_id), job["id"]))
+        return True
+    
+    async def _worker(self):
+        await self.bot.wait_until_ready()
+        while True:
+            key = await self._queue.get()
+            try:
+                await self._run(key)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+    
+    def _runnable(self, job: Dict, now: datetime) -> List[str]:
+        steps = job["steps"]
+        return [
+            step for step, needs in STEPS.items()
+            if steps[step]["state"] == "pending"
+            and all(steps[n]["state"] == "done" for n in needs)
+            and datetime.fromisoformat(steps[step]["due"]) <= now
+        ]
+    
+    async def _run(self, key: Tuple[int, str]):
+        self._timers.pop(key, None)
+        guild_id, job_id = key
+        db = self.bot.dbs.get(guild_id)
+        job = db.get_job(job_id)
+        if not job:
+            return
+        
+        runnable = self._runnable(job, datetime.now())
+        while runnable:
+            await asyncio.gather(*(self._attempt(db, job, step) for step in runnable))
+            runnable = self._runnable(job, datetime.now())
+        
+        # A step that failed for good blocks everything depending on it
+        steps = job["steps"]
+        waiting = [
+            datetime.fromisoformat(state["due"]) for step, state in steps.items()
+            if state["state"] == "pending" and all(steps[n]["state"] != "failed" for n in STEPS[step])
+        ]
+        if not waiting:
+            failed = [step for step, state in steps.items() if state["state"] != "done"]
+            if failed:
+                print(f"Close job {job_id} in guild {guild_id} gave up on: {', '.join(failed)}")
+            db.remove_job(job_id)
+            return
+        
+        delay = max((min(waiting) - datetime.now()).total_seconds(), 0)
+        self._timers[key] = asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, key)
+    
+    async def _attempt(self, db, job: Dict, step: str):
+        state = job["steps"][step]
+        try:
+            await getattr(self, f"_step_{step}")(db, job)
+        except Exception as e:
+            state["attempts"] += 1
+            state["error"] = f"{type(e).__name__}: {e}"
+            if state["attempts"] >= MAX_ATTEMPTS:
+                state["state"] = "failed"
+            else:
+                backoff = min(RETRY_BASE * 2 ** (state["attempts"] - 1), RETRY_MAX)
+                state["due"] = (datetime.now() + timedelta(seconds=backoff)).isoformat()
+        else:
+            state["state"] = "done"
+            state["error"] = None
+        db.update_job(job["id"], {"steps": job["steps"]})
+    
+    # Steps
+    async def _step_archive(self, db, job: Dict):
+        ticket = db.get_ticket(job["ticket_id"])
+        if ticket and ticket["status"] == "open":
+            db.close_ticket(job["ticket_id"], job["closed_by"])
+        self.bot.dispatch("ticket_closed", int(job["guild_id"]), job["ticket_id"])
+    
+    async def _step_upload(self, db, job: Dict):
+        transcripts_channel = self.bot.get_channel(db.get_config_id('transcripts_channel_id'))
+        ticket = await db.get_ticket_details(job["ticket_id"])
+        if not transcripts_channel or not ticket:
+            return
+        
+        # Rendered straight into a buffer and uploaded from it
+        type_label = TICKET_TYPES.get(ticket['type'], {}).get('label', ticket['type'])
+        files = []
+        for fmt in transcript_formats():
+            transcript = await asyncio.to_thread(render_transcript, ticket, type_label, fmt)
+            files.append(discord.File(transcript, transcript_filename(ticket['id'], fmt)))
+        embed = discord.Embed(
+            title=f"📝 Transcript • {ticket['id']}",
+            color=SUCCESS_COLOR,
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="Type", value=type_label, inline=True)
+        embed.add_field(name="User", value=f"<@{ticket['user_id']}>", inline=True)
+        embed.add_field(name="Closed By", value=f"<@{job['closed_by']}>", inline=True)
+        if ticket.get('claimed_by'):
+            embed.add_field(name="Claimed By", value=f"<@{ticket['claimed_by']}>", inline=True)
+        
+        await transcripts_channel.send(embed=embed, files=files)
+    
+    async def _step_notify(self, db, job: Dict):
+        ticket = db.get_ticket(job["ticket_id"])
+        guild = self.bot.get_guild(int(job["guild_id"]))
+        if not guild or not ticket:
+            return
+        # Members are only cached with the members intent; fetch otherwise
+        owner = guild.get_member(int(ticket['user_id']))
+        if owner is None:
+            try:
+                owner = await guild.fetch_member(int(ticket['user_id']))
+            except discord.NotFound:
+                # Left the server
+                return
+        
+        try:
+            await owner.send(
+                f"🔒 Your ticket `{ticket['id']}` has been closed.\n"
+                f"Please rate your experience:",
+                view=RatingView(guild.id, ticket['id'])
+            )
+        except discord.Forbidden:
+            # DMs closed; retrying won't change that
+            pass
+    
+    async def _step_delete(self, db, job: Dict):
+        channel = self.bot.get_channel(int(job["channel_id"]))
+        if not channel:
+            return
+        try:
+            await channel.delete()
+        except discord.NotFound:
+            pass
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(CloseQueue(bot))
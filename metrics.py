@@ -0,0 +1,255 @@
+import functools
+import logging
+import math
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# Samples kept per tracker; the percentiles describe the latest ones only
+LATENCY_WINDOW = 1000
+
+# Histogram bounds in seconds, from a fast dict lookup to a slow API call
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1024, 16384, 131072, 1048576, 8388608, 67108864)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = ""
+    
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self._children: Dict[Tuple[str, ...], object] = {}
+    
+    def labels(self, *values) -> object:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._expose_child(key, child))
+        return lines
+    
+    def _expose_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+class _Value:
+    __slots__ = ('value',)
+    
+    def __init__(self):
+        self.value = 0
+    
+    def inc(self, amount: float = 1):
+        self.value += amount
+    
+    def dec(self, amount: float = 1):
+        self.value -= amount
+    
+    def set(self, value: float):
+        self.value = value
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def _new_child(self):
+        return _Value()
+    
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+class Gauge(Metric):
+    kind = "gauge"
+    
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), fn: Callable[[], float] = None):
+        super().__init__(name, help, labels)
+        # Read lazily at scrape time, so the hot path never touches it
+        self.fn = fn
+    
+    def _new_child(self):
+        return _Value()
+    
+    def set(self, value: float):
+        self.labels().set(value)
+    
+    def expose(self) -> List[str]:
+        if self.fn is not None:
+            self.set(self.fn())
+        return super().expose()
+
+class _HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+    
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+    
+    def observe(self, value: float):
+        self.labels().observe(value)
+    
+    def _expose_child(self, key, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += n
+            le = 'le="' + _format_value(bound if bound == math.inf else float(bound)) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+    
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = (), fn: Callable[[], float] = None) -> Gauge:
+        gauge = self.register(Gauge(name, help, labels))
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+    
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+    
+    def expose(self) -> str:
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].expose())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+LATENCY_SECONDS = REGISTRY.histogram(
+    "west_latency_seconds", "Latency of commands, component callbacks and ticket steps", ("name",)
+)
+RATE_LIMITS = REGISTRY.counter(
+    "west_discord_rate_limits_total", "429 responses from the Discord API", ("method", "scope")
+)
+RATE_LIMIT_WAIT = REGISTRY.counter(
+    "west_discord_rate_limit_wait_seconds_total", "Time spent waiting out 429 responses", ("method",)
+)
+
+class LatencyTracker:
+    def __init__(self, name: str, window: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self._histogram = LATENCY_SECONDS.labels(name)
+    
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self._histogram.observe(seconds)
+    
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter() - started)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'p50': self.percentile(0.5),
+            'p99': self.percentile(0.99),
+            'max': max(self.samples) if self.samples else None
+        }
+
+LATENCIES: Dict[str, LatencyTracker] = {}
+
+def latency(name: str) -> LatencyTracker:
+    tracker = LATENCIES.get(name)
+    if tracker is None:
+        tracker = LATENCIES[name] = LatencyTracker(name)
+    return tracker
+
+def latency_report() -> Dict[str, Dict]:
+    return {name: tracker.summary() for name, tracker in sorted(LATENCIES.items())}
+
+def timed(name: str):
+    # Goes directly above `async def`, under the command/button decorators,
+    # so they see the wrapper and its (unchanged) signature
+    def decorator(func):
+        tracker = latency(name)
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                tracker.record(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+class RateLimitHandler(logging.Handler):
+    # discord.py handles 429s itself and only logs them; count those records
+    def emit(self, record: logging.LogRecord):
+        if record.levelno < logging.WARNING or not isinstance(record.msg, str):
+            return
+        if record.msg.startswith("We are being rate limited") and record.args:
+            method, retry_after = record.args[0], record.args[-1]
+            RATE_LIMITS.labels(method, "route").inc()
+            RATE_LIMIT_WAIT.labels(method).inc(float(retry_after))
+        elif record.msg.startswith("Global rate limit"):
+            RATE_LIMITS.labels("", "global").inc()
+
+def install_rate_limit_handler():
+    logger = logging.getLogger("discord.http")
+    if not any(isinstance(h, RateLimitHandler) for h in logger.handlers):
+        logger.addHandler(RateLimitHandler())
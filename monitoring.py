@@ -0,0 +1,71 @@
+from discord.ext import commands, tasks
+import math
+import os
+import time
+from aiohttp import web
+
+from utils.metrics import REGISTRY, install_rate_limit_handler
+
+# Local Prometheus-style text endpoint; METRICS_PORT=0 turns it off
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+# How often the event loop is sampled for lag
+LAG_INTERVAL = 0.5
+
+class Monitoring(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._runner = None
+        self._last_tick = None
+        
+        self.loop_lag = REGISTRY.histogram(
+            "west_event_loop_lag_seconds", "How late the event loop ran a timer that was due"
+        )
+        # Totals over the guild partitions this process has loaded
+        REGISTRY.gauge("west_guild_partitions", "Guild databases loaded", fn=lambda: len(self.bot.dbs))
+        REGISTRY.gauge(
+            "west_open_tickets", "Tickets currently open",
+            fn=lambda: sum(db.count_tickets('open') for db in self.bot.dbs.values())
+        )
+        REGISTRY.gauge(
+            "west_close_jobs", "Close jobs not yet finished",
+            fn=lambda: sum(len(db.get_jobs()) for db in self.bot.dbs.values())
+        )
+        REGISTRY.gauge(
+            "west_gateway_latency_seconds", "Heartbeat round trip to the Discord gateway",
+            fn=lambda: self.bot.latency if math.isfinite(self.bot.latency) else 0
+        )
+    
+    async def cog_load(self):
+        install_rate_limit_handler()
+        self.lag_loop.start()
+        if METRICS_PORT:
+            app = web.Application()
+            app.router.add_get("/metrics", self.serve_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, METRICS_HOST, METRICS_PORT).start()
+            print(f"Metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    
+    async def cog_unload(self):
+        self.lag_loop.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def serve_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=REGISTRY.expose().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+    
+    @tasks.loop(seconds=LAG_INTERVAL)
+    async def lag_loop(self):
+        # Anything blocking the loop delays this tick past its schedule
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            self.loop_lag.observe(max(now - self._last_tick - LAG_INTERVAL, 0.0))
+        self._last_tick = now
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Monitoring(bot))
@@ -0,0 +1,166 @@
+import discord
+from discord.ext import commands, tasks
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+
+# Warm pool of hidden channels in each guild's ticket category. Disabled
+# unless TICKET_POOL_MAX is set; a guild's target size floats between MIN and
+# MAX with its busiest recent hour of ticket opens.
+POOL_MIN = int(os.getenv("TICKET_POOL_MIN", "0"))
+POOL_MAX = int(os.getenv("TICKET_POOL_MAX", "0"))
+# Keep enough channels for this many minutes of peak demand
+POOL_LEAD_MINUTES = float(os.getenv("TICKET_POOL_LEAD_MINUTES", "15"))
+POOL_LOOKBACK_HOURS = 3
+# Seconds between channel creates, and how long to back off once throttled
+POOL_PACE = float(os.getenv("TICKET_POOL_PACE", "2"))
+POOL_MAX_BACKOFF = 300
+REFILL_INTERVAL = 15
+POOL_PREFIX = "pool-"
+
+class TicketPool(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # Per guild: pooled channel IDs, the create backoff in seconds, and
+        # the monotonic time before which a throttled guild is skipped
+        self._channels: Dict[int, Deque[int]] = {}
+        self._discovered: Set[int] = set()
+        self._backoff: Dict[int, float] = {}
+        self._next_attempt: Dict[int, float] = {}
+    
+    async def cog_load(self):
+        if POOL_MAX > 0:
+            self.refill_loop.start()
+    
+    async def cog_unload(self):
+        self.refill_loop.cancel()
+    
+    def size(self, guild_id: int) -> int:
+        return len(self._channels.get(guild_id, ()))
+    
+    def target_size(self, guild_id: int) -> int:
+        peak = self.bot.dbs.get(guild_id).rollups.peak_hourly('tickets_created', POOL_LOOKBACK_HOURS)
+        wanted = math.ceil(peak * POOL_LEAD_MINUTES / 60)
+        return max(POOL_MIN, min(POOL_MAX, wanted))
+    
+    def acquire(self, guild_id: int) -> Optional[discord.TextChannel]:
+        # Synchronous so two concurrent opens can never get the same channel
+        channels = self._channels.get(guild_id)
+        while channels:
+            channel = self.bot.get_channel(channels.popleft())
+            if channel:
+                return channel
+        return None
+    
+    def _discover(self, category: discord.CategoryChannel):
+        # Pool channels survive restarts; pick them back up instead of
+        # creating a fresh set
+        channels = self._channels.setdefault(category.guild.id, deque())
+        for channel in category.text_channels:
+            if channel.name.startswith(POOL_PREFIX):
+                channels.append(channel.id)
+        self._discovered.add(category.guild.id)
+    
+    @tasks.loop(seconds=REFILL_INTERVAL)
+    async def refill_loop(self):
+        # Guilds refill side by side; a throttled guild is skipped until its
+        # backoff runs out rather than holding up the pass. Only partitions
+        # already loaded are considered
+        await asyncio.gather(*(self._refill(guild_id, db) for guild_id, db in list(self.bot.dbs.items())))
+    
+    async def _refill(self, guild_id: int, db):
+        category = self.bot.get_channel(db.get_config_id('category_id'))
+        if not category:
+            return
+        if guild_id not in self._discovered:
+            self._discover(category)
+        channels = self._channels[guild_id]
+        
+        if time.monotonic() < self._next_attempt.get(guild_id, 0.0):
+            return
+        
+        target = self.target_size(guild_id)
+        while len(channels) < target:
+            started = time.monotonic()
+            try:
+                channel = await category.guild.create_text_channel(
+                    name=f"{POOL_PREFIX}{int(time.time() * 1000) % 1_000_000:06d}",
+                    category=category,
+                    overwrites={
+                        category.guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                        category.guild.me: discord.PermissionOverwrite(read_messages=True, manage_channels=True)
+                    },
+                    topic="Reserved for the next ticket"
+                )
+            except discord.HTTPException:
+                self._throttle(guild_id)
+                return
+            if self._channels.get(guild_id) is not channels:
+                # The category changed while this was being created
+                await self._delete(channel)
+                return
+            channels.append(channel.id)
+            
+            # discord.py sleeps through 429s inside the call; a create that
+            # took far longer than usual means the route is throttled, so
+            # leave the remaining budget to real ticket opens
+            if time.monotonic() - started > POOL_PACE * 5:
+                self._throttle(guild_id)
+                return
+            self._backoff[guild_id] = 0.0
+            await asyncio.sleep(POOL_PACE)
+        
+        # Shrink slowly after a rush: one channel per pass
+        if len(channels) > target:
+            channel = self.bot.get_channel(channels.pop())
+            if channel:
+                await self._delete(channel)
+    
+    async def _delete(self, channel: discord.abc.GuildChannel) -> bool:
+        try:
+            await channel.delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            return False
+        return True
+    
+    async def discard(self, channel: discord.TextChannel):
+        # A pooled channel that could not be turned into a ticket; pooled
+        # again if it can't be deleted either, so it is never left behind
+        # (without a pool, discovery picks it up by name)
+        if not await self._delete(channel) and channel.guild.id in self._channels:
+            self._channels[channel.guild.id].append(channel.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_config_changed(self, guild_id: int, key: str, previous: Optional[str]):
+        # Pooled channels sit in the old category: delete them and start over
+        # in the new one
+        if key != 'category_id' or previous == self.bot.dbs.get(guild_id).get_config().get(key):
+            return
+        pooled = set(self._channels.pop(guild_id, ()))
+        if guild_id not in self._discovered and previous:
+            # Left over from an earlier run and not picked up yet
+            old = self.bot.get_channel(int(previous))
+            if isinstance(old, discord.CategoryChannel):
+                pooled.update(c.id for c in old.text_channels if c.name.startswith(POOL_PREFIX))
+        self._discovered.discard(guild_id)
+        for channel_id in pooled:
+            channel = self.bot.get_channel(channel_id)
+            if channel:
+                await self._delete(channel)
+    
+    def _throttle(self, guild_id: int):
+        backoff = self._backoff.get(guild_id, 0.0)
+        self._backoff[guild_id] = min(max(backoff * 2, POOL_PACE), POOL_MAX_BACKOFF)
+        self._next_attempt[guild_id] = time.monotonic() + self._backoff[guild_id]
+    
+    @refill_loop.before_loop
+    async def before_refill(self):
+        await self.bot.wait_until_ready()
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(TicketPool(bot))
@@ -0,0 +1,139 @@
+import discord
+from discord.ext import commands, tasks
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.metrics import timed
+
+# Buffered transcript entries are written per ticket once this many pile up,
+# and everything is written at least every FLUSH_INTERVAL seconds
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 5
+
+# Ticket IDs repeat across guilds, so buffers are keyed by both
+TicketKey = Tuple[int, str]
+
+class TranscriptRecorder(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._buffers: Dict[TicketKey, List[Dict]] = {}
+        self._authors: Dict[TicketKey, Set[str]] = {}
+    
+    async def cog_load(self):
+        self.flush_loop.start()
+    
+    async def cog_unload(self):
+        self.flush_loop.cancel()
+        self.flush_all()
+    
+    @tasks.loop(seconds=FLUSH_INTERVAL)
+    async def flush_loop(self):
+        self.flush_all()
+    
+    def _open_ticket(self, guild_id: Optional[int], channel_id: int) -> Optional[Dict]:
+        # Guilds that never opened a ticket have no partition to look in
+        db = self.bot.dbs.find(guild_id) if guild_id is not None else None
+        ticket = db.get_ticket_by_channel(channel_id) if db else None
+        return ticket if ticket and ticket['status'] == 'open' else None
+    
+    def _record(self, key: TicketKey, entry: Dict):
+        buffer = self._buffers.setdefault(key, [])
+        buffer.append(entry)
+        if len(buffer) >= BATCH_SIZE:
+            self.flush(key)
+    
+    def flush(self, key: TicketKey):
+        entries = self._buffers.pop(key, None)
+        if entries:
+            guild_id, ticket_id = key
+            self.bot.dbs.get(guild_id).add_transcript_messages(ticket_id, entries)
+    
+    def flush_all(self):
+        for key in list(self._buffers):
+            self.flush(key)
+    
+    def finish(self, guild_id: int, ticket_id: str):
+        # Called right before a ticket closes so its transcript is complete
+        self.flush((guild_id, ticket_id))
+        self._authors.pop((guild_id, ticket_id), None)
+    
+    def is_first_message(self, guild_id: int, ticket: Dict, author_id: str) -> bool:
+        key = (guild_id, ticket['id'])
+        seen = self._authors.get(key)
+        if seen is None:
+            seen = {m.get('author_id') for m in ticket.get('transcript', [])}
+            self._authors[key] = seen
+        if author_id in seen:
+            return False
+        seen.add(author_id)
+        return True
+    
+    @commands.Cog.listener()
+    @timed("event.recorder")
+    async def on_message(self, message: discord.Message):
+        if message.guild is None:
+            return
+        
+        ticket = self._open_ticket(message.guild.id, message.channel.id)
+        if not ticket:
+            return
+        
+        entry = {
+            "message_id": str(message.id),
+            "author": str(message.author),
+            "author_id": str(message.author.id),
+            "bot": message.author.bot,
+            "avatar": message.author.display_avatar.url,
+            "content": message.content,
+            "timestamp": message.created_at.isoformat(),
+            "attachments": [a.url for a in message.attachments]
+        }
+        if message.embeds:
+            entry["embeds"] = [
+                {"title": e.title, "description": e.description, "color": e.color.value if e.color else None}
+                for e in message.embeds
+            ]
+        self._record((message.guild.id, ticket['id']), entry)
+        
+        if not message.author.bot:
+            first = self.is_first_message(message.guild.id, ticket, str(message.author.id))
+            self.bot.dispatch("ticket_message", message, ticket, first)
+    
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        # Embed unfurls also fire edits; only content changes matter here
+        if 'content' not in payload.data:
+            return
+        
+        ticket = self._open_ticket(payload.guild_id, payload.channel_id)
+        if not ticket:
+            return
+        
+        self._record((payload.guild_id, ticket['id']), {
+            "event": "edit",
+            "message_id": str(payload.message_id),
+            "content": payload.data['content'],
+            "timestamp": discord.utils.utcnow().isoformat()
+        })
+    
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        ticket = self._open_ticket(payload.guild_id, payload.channel_id)
+        if ticket:
+            self._record_delete((payload.guild_id, ticket['id']), payload.message_id)
+    
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        ticket = self._open_ticket(payload.guild_id, payload.channel_id)
+        if ticket:
+            for message_id in payload.message_ids:
+                self._record_delete((payload.guild_id, ticket['id']), message_id)
+    
+    def _record_delete(self, key: TicketKey, message_id: int):
+        self._record(key, {
+            "event": "delete",
+            "message_id": str(message_id),
+            "timestamp": discord.utils.utcnow().isoformat()
+        })
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(TranscriptRecorder(bot))
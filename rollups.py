@@ -0,0 +1,258 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+# Ratings that make up the rolling "recent" average
+RATING_WINDOW = 50
+
+# How long fine-grained buckets are kept around
+HOURLY_RETENTION = timedelta(hours=48)
+DAILY_RETENTION = timedelta(days=400)
+
+PERIODS = {
+    'today': "Today",
+    '24h': "Last 24 Hours",
+    'week': "Last 7 Days",
+    'month': "This Month",
+    'all': "All Time"
+}
+
+COUNTERS = ('tickets_created', 'tickets_closed', 'ratings')
+DURATIONS = ('time_to_claim', 'time_to_close')
+
+class QuantileSketch:
+    # Log-bucketed histogram (DDSketch style): every quantile is within
+    # ALPHA relative error, and a few hundred buckets cover seconds to years
+    ALPHA = 0.02
+    GAMMA = (1 + ALPHA) / (1 - ALPHA)
+    LOG_GAMMA = math.log(GAMMA)
+    
+    def __init__(self, data: Optional[Dict] = None):
+        data = data or {}
+        self.bins: Dict[str, int] = data.get('bins', {})
+        self.count: int = data.get('count', 0)
+        self.total: float = data.get('total', 0.0)
+    
+    def to_dict(self) -> Dict:
+        return {'bins': self.bins, 'count': self.count, 'total': self.total}
+    
+    def add(self, value: float):
+        index = str(math.ceil(math.log(value) / self.LOG_GAMMA)) if value > 1e-9 else "z"
+        self.bins[index] = self.bins.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+    
+    def merge(self, other: "QuantileSketch"):
+        for index, n in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+    
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.bins, key=lambda i: -math.inf if i == "z" else int(i)):
+            seen += self.bins[index]
+            if seen > rank:
+                if index == "z":
+                    return 0.0
+                return 2 * self.GAMMA ** int(index) / (self.GAMMA + 1)
+        return None
+    
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+class RatingAggregate:
+    # Running count/sum/histogram of ratings, a rolling window of the latest
+    # RATING_WINDOW, and per-staff totals keyed by the ticket's claimer.
+    # Wraps (and mutates) the plain dict that gets persisted.
+    def __init__(self, data: Dict):
+        self.data = data
+        data.setdefault('count', 0)
+        data.setdefault('sum', 0)
+        data.setdefault('histogram', {})
+        data.setdefault('recent', [])
+        data.setdefault('staff', {})
+    
+    def add(self, stars: int, staff_id: Optional[str] = None):
+        self._apply(stars, staff_id, 1)
+        recent = self.data['recent']
+        recent.append(stars)
+        if len(recent) > RATING_WINDOW:
+            del recent[0]
+    
+    def remove(self, stars: int, staff_id: Optional[str] = None):
+        # Used when a ticket is re-rated; the rolling window keeps both
+        self._apply(stars, staff_id, -1)
+    
+    def _apply(self, stars: int, staff_id: Optional[str], sign: int):
+        data = self.data
+        data['count'] += sign
+        data['sum'] += sign * stars
+        key = str(stars)
+        data['histogram'][key] = data['histogram'].get(key, 0) + sign
+        if staff_id:
+            staff = data['staff'].setdefault(staff_id, {'count': 0, 'sum': 0})
+            staff['count'] += sign
+            staff['sum'] += sign * stars
+    
+    @property
+    def average(self) -> float:
+        return self.data['sum'] / self.data['count'] if self.data['count'] else 0
+    
+    @property
+    def recent_average(self) -> float:
+        recent = self.data['recent']
+        return sum(recent) / len(recent) if recent else 0
+    
+    def staff_averages(self) -> Dict[str, Dict]:
+        return {
+            staff_id: {'count': s['count'], 'average': s['sum'] / s['count']}
+            for staff_id, s in self.data['staff'].items() if s['count']
+        }
+
+def _empty_bucket() -> Dict:
+    bucket = {metric: {} for metric in COUNTERS}
+    for metric in DURATIONS:
+        bucket[metric] = QuantileSketch().to_dict()
+    return bucket
+
+class StatsRollup:
+    # Maintains created/closed/rating counters and response-time sketches in
+    # hourly, daily, monthly and lifetime buckets. Every event touches exactly
+    # four buckets and every query merges at most 24, whatever the history.
+    def __init__(self, buckets: Dict[str, Dict]):
+        self.buckets = buckets
+        # Retention cutoffs while backfilling: older buckets are skipped
+        # rather than created and pruned, and pruning waits for the end
+        self._backfill_cutoffs: Optional[Dict[str, str]] = None
+    
+    @staticmethod
+    def bucket_keys(when: datetime) -> List[str]:
+        hour = when.strftime("%Y-%m-%dT%H")
+        return [f"h:{hour}", f"d:{hour[:10]}", f"m:{hour[:7]}", "all"]
+    
+    def _bucket(self, key: str, expired: List[str]) -> Optional[Dict]:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            cutoffs = self._backfill_cutoffs
+            if cutoffs is not None and key[0] in "hd" and key < cutoffs[key[0]]:
+                return None
+            bucket = self.buckets[key] = _empty_bucket()
+            if key[0] in "hd" and self._backfill_cutoffs is None:
+                expired.extend(self._prune(key[0], datetime.now()))
+        return bucket
+    
+    @staticmethod
+    def _cutoff(kind: str, now: datetime) -> str:
+        if kind == "h":
+            return (now - HOURLY_RETENTION).strftime("h:%Y-%m-%dT%H")
+        return (now - DAILY_RETENTION).strftime("d:%Y-%m-%d")
+    
+    def _prune(self, kind: str, now: datetime) -> List[str]:
+        cutoff = self._cutoff(kind, now)
+        stale = [k for k in self.buckets if k[0] == kind and k < cutoff]
+        for key in stale:
+            del self.buckets[key]
+        return stale
+    
+    def record(self, metric: str, category: str, when: datetime):
+        # Returns (touched, expired) bucket keys for the caller to persist
+        touched, expired = [], []
+        for key in self.bucket_keys(when):
+            bucket = self._bucket(key, expired)
+            if bucket is None:
+                continue
+            counts = bucket[metric]
+            counts[category] = counts.get(category, 0) + 1
+            touched.append(key)
+        return touched, expired
+    
+    def record_duration(self, metric: str, seconds: float, when: datetime):
+        touched, expired = [], []
+        for key in self.bucket_keys(when):
+            bucket = self._bucket(key, expired)
+            if bucket is None:
+                continue
+            touched.append(key)
+            sketch = QuantileSketch(bucket[metric])
+            sketch.add(max(seconds, 0.0))
+            bucket[metric] = sketch.to_dict()
+        return touched, expired
+    
+    def peak_hourly(self, metric: str, hours: int, now: Optional[datetime] = None) -> int:
+        # Busiest of the last `hours` hourly buckets, the current partial one included
+        now = now or datetime.now()
+        peak = 0
+        for h in range(hours):
+            bucket = self.buckets.get((now - timedelta(hours=h)).strftime("h:%Y-%m-%dT%H"))
+            if bucket:
+                peak = max(peak, sum(bucket[metric].values()))
+        return peak
+    
+    def _period_keys(self, period: str, now: datetime) -> Iterable[str]:
+        if period == 'today':
+            return [now.strftime("d:%Y-%m-%d")]
+        if period == '24h':
+            return [(now - timedelta(hours=h)).strftime("h:%Y-%m-%dT%H") for h in range(24)]
+        if period == 'week':
+            return [(now - timedelta(days=d)).strftime("d:%Y-%m-%d") for d in range(7)]
+        if period == 'month':
+            return [now.strftime("m:%Y-%m")]
+        return ["all"]
+    
+    def period_anchor(self, period: str, now: Optional[datetime] = None) -> str:
+        # Newest bucket in the window: a period's summary can only change when
+        # a bucket is written or the window slides on to a new anchor
+        return next(iter(self._period_keys(period, now or datetime.now())))
+    
+    def summary(self, period: str, now: Optional[datetime] = None) -> Dict:
+        result = {metric: {} for metric in COUNTERS}
+        sketches = {metric: QuantileSketch() for metric in DURATIONS}
+        for key in self._period_keys(period, now or datetime.now()):
+            bucket = self.buckets.get(key)
+            if not bucket:
+                continue
+            for metric in COUNTERS:
+                for category, n in bucket[metric].items():
+                    result[metric][category] = result[metric].get(category, 0) + n
+            for metric in DURATIONS:
+                sketches[metric].merge(QuantileSketch(bucket[metric]))
+        
+        for metric, sketch in sketches.items():
+            result[metric] = {
+                'count': sketch.count,
+                'mean': sketch.mean,
+                'p50': sketch.quantile(0.5),
+                'p90': sketch.quantile(0.9)
+            }
+        return result
+    
+    def backfill(self, tickets: Iterable[Dict], ratings: Dict[str, Dict]):
+        # One-off rebuild from existing tickets when rollups are first enabled
+        now = datetime.now()
+        self._backfill_cutoffs = {kind: self._cutoff(kind, now) for kind in "hd"}
+        try:
+            self._replay(tickets, ratings, now)
+        finally:
+            self._backfill_cutoffs = None
+        for kind in "hd":
+            self._prune(kind, now)
+    
+    def _replay(self, tickets: Iterable[Dict], ratings: Dict[str, Dict], now: datetime):
+        for ticket in tickets:
+            created = datetime.fromisoformat(ticket['created_at'])
+            self.record('tickets_created', ticket['type'], created)
+            if ticket.get('claimed_at'):
+                claimed = datetime.fromisoformat(ticket['claimed_at'])
+                self.record_duration('time_to_claim', (claimed - created).total_seconds(), claimed)
+            if ticket.get('closed_at'):
+                closed = datetime.fromisoformat(ticket['closed_at'])
+                self.record('tickets_closed', ticket['type'], closed)
+                self.record_duration('time_to_close', (closed - created).total_seconds(), closed)
+        for rating in ratings.values():
+            rated = datetime.fromisoformat(rating['rated_at']) if rating.get('rated_at') else now
+            self.record('ratings', str(rating['stars']), rated)
@@ -0,0 +1,184 @@
+import discord
+from discord import app_commands
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from utils.metrics import REGISTRY
+from utils.storage import COLLECTIONS, write_atomic
+
+# Hash of the last command tree synced, globally or per guild, so restarts
+# only sync when a command actually changed; FORCE_COMMAND_SYNC=1 forces it
+SYNC_STATE_FILE = os.path.join('data', 'command_sync.json')
+
+# Gateway subscriptions. Slash commands and components arrive as interactions
+# and need no intent; ticket channels need guild messages with their content.
+# 'members' adds the member list for deployments that want it cached.
+INTENT_PROFILES = {
+    'minimal': ('guilds', 'guild_messages', 'message_content'),
+    'members': ('guilds', 'guild_messages', 'message_content', 'members'),
+    'all': None
+}
+INTENTS_PROFILE = os.getenv("INTENTS_PROFILE", "minimal").lower()
+# Transcripts are recorded from raw events, so the message cache only serves
+# discord.py itself; MAX_MESSAGES=0 turns it off
+MAX_MESSAGES = int(os.getenv("MAX_MESSAGES", "100"))
+CHUNK_GUILDS_AT_STARTUP = os.getenv("CHUNK_GUILDS_AT_STARTUP", "0") == "1"
+
+# Objects measured per cache; the total is extrapolated from the sample
+MEMORY_SAMPLE = 200
+
+STARTUP_SECONDS = REGISTRY.gauge("west_startup_seconds", "Duration of each phase of the last startup", ("phase",))
+CACHE_BYTES = REGISTRY.gauge("west_cache_bytes", "Estimated size of each cache when the bot became ready", ("cache",))
+
+def gateway_options() -> Dict:
+    if INTENTS_PROFILE not in INTENT_PROFILES:
+        raise ValueError(
+            f"Unknown INTENTS_PROFILE '{INTENTS_PROFILE}' (expected one of: {', '.join(INTENT_PROFILES)})"
+        )
+    flags = INTENT_PROFILES[INTENTS_PROFILE]
+    intents = discord.Intents.all() if flags is None else discord.Intents(**{flag: True for flag in flags})
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+        # discord.py reads 0 as "use the default", None as no cache
+        'max_messages': MAX_MESSAGES or None,
+        'chunk_guilds_at_startup': CHUNK_GUILDS_AT_STARTUP
+    }
+
+class StartupTimer:
+    # Phases may overlap (the database loads while logging in), so each one
+    # keeps its own start and end relative to process start
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, Tuple[float, Optional[float]]] = {}
+        self.reported = False
+    
+    def begin(self, name: str):
+        self.phases[name] = (time.perf_counter() - self.started, None)
+    
+    def end(self, name: str):
+        begun, _ = self.phases[name]
+        ended = time.perf_counter() - self.started
+        self.phases[name] = (begun, ended)
+        STARTUP_SECONDS.labels(name).set(ended - begun)
+    
+    @contextmanager
+    def phase(self, name: str):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+    
+    def report(self) -> str:
+        self.reported = True
+        total = time.perf_counter() - self.started
+        STARTUP_SECONDS.labels("total").set(total)
+        lines = [f"Startup took {total:.2f}s"]
+        for name, (begun, ended) in self.phases.items():
+            if ended is not None:
+                lines.append(f"  {name:<14} {ended - begun:6.2f}s  (at {begun:.2f}s)")
+        return "\n".join(lines)
+
+def command_tree_hash(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    # The same payload tree.sync() would upload, in a stable order
+    payload = [command.to_dict() for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda c: (c.get('type', 1), c['name']))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def _read_sync_state(path: str) -> Dict[str, str]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+async def sync_if_changed(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None,
+                          path: str = SYNC_STATE_FILE) -> bool:
+    digest = command_tree_hash(tree, guild)
+    key = str(guild.id) if guild else "global"
+    state = _read_sync_state(path)
+    if state.get(key) == digest and os.getenv("FORCE_COMMAND_SYNC") != "1":
+        return False
+    
+    await tree.sync(guild=guild)
+    # Only remembered once Discord accepted it, so a failed sync is retried
+    state[key] = digest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, json.dumps(state, indent=2))
+    return True
+
+def _deep_size(obj, seen: Set[int]) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    return size
+
+def _model_size(obj, seen: Set[int]) -> int:
+    # discord.py models all link back to the connection state, so only their
+    # own plain-data slots are counted, not the objects they point at
+    size = sys.getsizeof(obj)
+    for cls in type(obj).__mro__:
+        slots = getattr(cls, '__slots__', ())
+        for slot in (slots,) if isinstance(slots, str) else slots:
+            value = getattr(obj, slot, None)
+            if isinstance(value, (str, bytes, int, float, dict, list, tuple, set, frozenset, deque)):
+                size += _deep_size(value, seen)
+    return size
+
+def _estimate(items: List, sizer: Callable[[object, Set[int]], int]) -> int:
+    if not items:
+        return 0
+    step = max(1, len(items) // MEMORY_SAMPLE)
+    sample = items[::step][:MEMORY_SAMPLE]
+    seen: Set[int] = set()
+    return int(sum(sizer(item, seen) for item in sample) / len(sample) * len(items))
+
+def _resident_bytes() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _mib(size: int) -> str:
+    return f"{size / 2 ** 20:.1f} MiB"
+
+def memory_report(bot) -> str:
+    guilds = bot.guilds
+    caches = {
+        'members': ([m for g in guilds for m in g.members], _model_size),
+        'users': (list(bot.users), _model_size),
+        'channels': ([c for g in guilds for c in g.channels], _model_size),
+        'roles': ([r for g in guilds for r in g.roles], _model_size),
+        'messages': (list(bot.cached_messages), _model_size)
+    }
+    # Summed over the guild partitions this process has loaded
+    for name in COLLECTIONS:
+        caches[f"db.{name}"] = ([v for db in bot.dbs.values() for v in db.data[name].values()], _deep_size)
+    
+    intents = ", ".join(name for name, enabled in bot.intents if enabled)
+    lines = [
+        f"Guild partitions loaded: {len(bot.dbs)}",
+        f"Gateway: {INTENTS_PROFILE} intents ({intents}), "
+        f"message cache {MAX_MESSAGES or 'off'}, chunking {'on' if CHUNK_GUILDS_AT_STARTUP else 'off'}"
+    ]
+    for name, (items, sizer) in caches.items():
+        size = _estimate(items, sizer)
+        CACHE_BYTES.labels(name).set(size)
+        lines.append(f"  {name:<14} {len(items):>8} entries  ~{_mib(size)}")
+    resident = _resident_bytes()
+    if resident is not None:
+        lines.append(f"  {'process RSS':<14} {'':>8}          {_mib(resident)}")
+    return "\n".join(lines)
@@ -1,52 +1,122 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from typing import List, Optional
 
-from utils.embeds import EmbedBuilder
-from utils.database import TicketDatabase
+from cogs.tickets import TICKET_TYPES
+from utils.embeds import EmbedBuilder, embed_cache
+from utils.metrics import latency_report, timed
+from utils.rollups import PERIODS
 
-db = TicketDatabase()
+# Tickets per /mytickets page
+PAGE_SIZE = 10
 
 class Stats(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
     
     @app_commands.command(name="stats", description="View ticket statistics")
-    async def view_stats(self, interaction: discord.Interaction):
-        stats = db.get_stats()
-        avg_rating = db.get_average_rating()
-        
-        embed = EmbedBuilder.stats(stats, avg_rating)
+    @app_commands.describe(period="Time range to report on")
+    @app_commands.choices(period=[
+        app_commands.Choice(name=label, value=key) for key, label in PERIODS.items()
+    ])
+    @timed("command.stats")
+    async def view_stats(self, interaction: discord.Interaction, period: Optional[app_commands.Choice[str]] = None):
+        key = period.value if period else 'all'
+        db = self.bot.dbs.get(interaction.guild_id)
+        embed = embed_cache.get(
+            ("stats", interaction.guild_id, key, db.stats_version(key)),
+            lambda: self._stats_embed(db, key)
+        )
         await interaction.response.send_message(embed=embed)
     
+    def _stats_embed(self, db, period: str) -> discord.Embed:
+        stats = db.get_period_stats(period)
+        return EmbedBuilder.stats(stats, stats['average_rating'], PERIODS[period])
+    
+    @app_commands.command(name="staffratings", description="View average rating per staff member")
+    @timed("command.staffratings")
+    async def staff_ratings(self, interaction: discord.Interaction):
+        db = self.bot.dbs.get(interaction.guild_id)
+        embed = embed_cache.get(
+            ("staff_ratings", interaction.guild_id, db.versions['ratings']),
+            lambda: EmbedBuilder.staff_ratings(db.get_staff_ratings())
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="latency", description="View p50/p99 latency of ticket actions and cache hit rates")
+    @app_commands.checks.has_permissions(administrator=True)
+    @timed("command.latency")
+    async def latency(self, interaction: discord.Interaction):
+        embed = EmbedBuilder.latency(latency_report(), embed_cache.stats())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @app_commands.command(name="mytickets", description="View your ticket history")
-    async def my_tickets(self, interaction: discord.Interaction):
-        user_tickets = {k: v for k, v in db.data['tickets'].items() 
-                       if v['user_id'] == str(interaction.user.id)}
+    @app_commands.describe(status="Only show open or closed tickets", ticket_type="Only show one ticket type")
+    @app_commands.choices(
+        status=[app_commands.Choice(name="Open", value="open"), app_commands.Choice(name="Closed", value="closed")],
+        ticket_type=[app_commands.Choice(name=info['label'], value=key) for key, info in TICKET_TYPES.items()]
+    )
+    @timed("command.mytickets")
+    async def my_tickets(self, interaction: discord.Interaction, status: Optional[app_commands.Choice[str]] = None,
+                         ticket_type: Optional[app_commands.Choice[str]] = None):
+        view = TicketHistoryView(
+            self.bot.dbs.get(interaction.guild_id),
+            str(interaction.user.id),
+            status.value if status else None,
+            ticket_type.value if ticket_type else None
+        )
+        embed = view.load_page()
         
-        if not user_tickets:
+        if not view.tickets:
             await interaction.response.send_message(
-                embed=EmbedBuilder.info("You have no ticket history."),
+                embed=EmbedBuilder.info(
+                    "No tickets match those filters." if status or ticket_type else "You have no ticket history."
+                ),
                 ephemeral=True
             )
             return
         
-        embed = discord.Embed(
-            title="🎫 Your Ticket History",
-            color=0xDC2626
+        if view.next_cursor is None:
+            view.stop()
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        else:
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+class TicketHistoryView(discord.ui.View):
+    # Pages are fetched one at a time from the per-user index; the cursors of
+    # the pages already seen are kept so "Newer" can step back
+    def __init__(self, db, user_id: str, status: Optional[str] = None, ticket_type: Optional[str] = None):
+        super().__init__(timeout=300)
+        self.db = db
+        self.user_id = user_id
+        self.status = status
+        self.ticket_type = ticket_type
+        self.cursors: List[Optional[int]] = [None]
+        self.tickets: List[dict] = []
+        self.next_cursor: Optional[int] = None
+    
+    def load_page(self) -> discord.Embed:
+        self.tickets, self.next_cursor = self.db.get_user_ticket_page(
+            self.user_id, self.cursors[-1], PAGE_SIZE, self.status, self.ticket_type
         )
+        self.newer.disabled = len(self.cursors) == 1
+        self.older.disabled = self.next_cursor is None
         
-        for tid, ticket in list(user_tickets.items())[:10]:  # Last 10
-            status = "🟢 Open" if ticket['status'] == 'open' else "🔒 Closed"
-            rating = f"⭐ {ticket['rating']['stars']}/5" if ticket.get('rating') else "Not rated"
-            
-            embed.add_field(
-                name=f"{tid} • {ticket['type'].capitalize()}",
-                value=f"Status: {status} | Rating: {rating}",
-                inline=False
-            )
-        
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        filters = [f for f in (self.status, self.ticket_type) if f]
+        return EmbedBuilder.ticket_history(self.tickets, len(self.cursors), ", ".join(filters).title() or None)
+    
+    @discord.ui.button(label="Newer", style=discord.ButtonStyle.gray, emoji="◀️")
+    @timed("component.history_page")
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cursors.pop()
+        await interaction.response.edit_message(embed=self.load_page(), view=self)
+    
+    @discord.ui.button(label="Older", style=discord.ButtonStyle.gray, emoji="▶️")
+    @timed("component.history_page")
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cursors.append(self.next_cursor)
+        await interaction.response.edit_message(embed=self.load_page(), view=self)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Stats(bot))
@@ -0,0 +1,561 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+# Collections kept by TicketDatabase and their empty values
+COLLECTIONS = {
+    'tickets': dict,
+    'stats': dict,
+    'blacklist': dict,
+    'ratings': dict,
+    'rollups': dict,
+    'aggregates': dict,
+    'jobs': dict,
+    'triggers': dict,
+    'config': dict
+}
+
+def empty_data() -> Dict[str, Any]:
+    return {key: factory() for key, factory in COLLECTIONS.items()}
+
+def load_json_files(data_dir: str) -> Dict[str, Any]:
+    data = empty_data()
+    for key in COLLECTIONS:
+        path = os.path.join(data_dir, f"{key}.json")
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data[key] = json.load(f)
+    return data
+
+def write_atomic(path: str, text: str):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def apply_record(data: Dict[str, Any], record: Dict[str, Any]):
+    op = record['op']
+    col = record['col']
+    if op == 'replace':
+        data[col] = record['value']
+    elif op == 'put':
+        data[col][record['key']] = record['value']
+    elif op == 'update':
+        if record['key'] in data[col]:
+            data[col][record['key']].update(record['fields'])
+    elif op == 'append':
+        if record['key'] in data[col]:
+            data[col][record['key']].setdefault(record['field'], []).append(record['item'])
+    elif op == 'delete':
+        data[col].pop(record['key'], None)
+
+class StorageBackend:
+    """Persists the mutations TicketDatabase applies to its in-memory cache."""
+    
+    # Running total, exported as a metric
+    bytes_written = 0
+    
+    def load(self) -> Dict[str, Any]:
+        raise NotImplementedError
+    
+    def put(self, col: str, key: str, value: Any):
+        raise NotImplementedError
+    
+    def update(self, col: str, key: str, fields: Dict[str, Any]):
+        raise NotImplementedError
+    
+    def append(self, col: str, key: str, field: str, item: Any):
+        raise NotImplementedError
+    
+    def delete(self, col: str, key: str):
+        raise NotImplementedError
+    
+    def replace(self, col: str, value: Any):
+        raise NotImplementedError
+    
+    def flush(self):
+        raise NotImplementedError
+    
+    def close(self):
+        self.flush()
+
+class JsonBackend(StorageBackend):
+    """Legacy layout: one JSON file per collection, rewritten in full."""
+    
+    def __init__(self, data_dir: str = 'data'):
+        self.data_dir = data_dir
+        self.files = {key: os.path.join(data_dir, f"{key}.json") for key in COLLECTIONS}
+        self._data = None
+        self._dirty = set()
+    
+    def load(self) -> Dict[str, Any]:
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._data = load_json_files(self.data_dir)
+        for key, path in self.files.items():
+            if not os.path.exists(path):
+                self._dirty.add(key)
+        self.flush()
+        return self._data
+    
+    def put(self, col, key, value):
+        self._dirty.add(col)
+    
+    def update(self, col, key, fields):
+        self._dirty.add(col)
+    
+    def append(self, col, key, field, item):
+        self._dirty.add(col)
+    
+    def delete(self, col, key):
+        self._dirty.add(col)
+    
+    def replace(self, col, value):
+        self._data[col] = value
+        self._dirty.add(col)
+    
+    def flush(self):
+        dirty, self._dirty = self._dirty, set()
+        try:
+            for key in list(dirty):
+                text = self._dump(key)
+                write_atomic(self.files[key], text)
+                self.bytes_written += len(text)
+                dirty.discard(key)
+        except Exception:
+            self._dirty |= dirty
+            raise
+    
+    def _dump(self, key: str) -> str:
+        # Runs off the event loop while the cache keeps changing; a mutation
+        # racing the encoder just marks the collection dirty again.
+        while True:
+            try:
+                return json.dumps(self._data[key], indent=2, default=str)
+            except RuntimeError:
+                continue
+
+class JournalBackend(StorageBackend):
+    """Append-only mutation log, periodically compacted into a snapshot.
+    
+    Every record carries a sequence number and the snapshot stores the last
+    one it contains, so a crash between writing the snapshot and truncating
+    the log replays nothing twice. A torn record at the tail of the log is
+    discarded on load.
+    """
+    
+    def __init__(self, data_dir: str = 'data', compact_every: int = 1000, fsync: bool = True):
+        self.data_dir = data_dir
+        self.snapshot_path = os.path.join(data_dir, 'snapshot.json')
+        self.log_path = os.path.join(data_dir, 'journal.log')
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._seq = 0
+        self._since_snapshot = 0
+        self._pending: List[str] = []
+    
+    def load(self) -> Dict[str, Any]:
+        os.makedirs(self.data_dir, exist_ok=True)
+        data, snapshot_seq = self._read_snapshot()
+        if data is None:
+            # First start on this engine: import the legacy JSON files
+            data = load_json_files(self.data_dir)
+            self._write_snapshot(data, 0)
+        
+        good_offset, replayed, self._seq = self._replay(data, snapshot_seq)
+        self._since_snapshot = replayed
+        
+        # Drop a partially written tail so new records start on a clean line
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) != good_offset:
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(good_offset)
+        return data
+    
+    def _read_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return None, 0
+        with open(self.snapshot_path, 'r') as f:
+            snapshot = json.load(f)
+        data = empty_data()
+        data.update(snapshot['data'])
+        return data, snapshot['seq']
+    
+    def _write_snapshot(self, data: Dict[str, Any], seq: int):
+        write_atomic(self.snapshot_path, json.dumps({'seq': seq, 'data': data}, default=str))
+    
+    def _replay(self, data: Dict[str, Any], after_seq: int):
+        last_seq = after_seq
+        if not os.path.exists(self.log_path):
+            return 0, 0, last_seq
+        offset = 0
+        replayed = 0
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                offset += len(line)
+                if record['seq'] <= after_seq:
+                    continue
+                apply_record(data, record)
+                last_seq = record['seq']
+                replayed += 1
+        return offset, replayed, last_seq
+    
+    def _record(self, **record):
+        self._seq += 1
+        record['seq'] = self._seq
+        self._pending.append(json.dumps(record, default=str, separators=(',', ':')))
+    
+    def put(self, col, key, value):
+        self._record(op='put', col=col, key=key, value=value)
+    
+    def update(self, col, key, fields):
+        self._record(op='update', col=col, key=key, fields=fields)
+    
+    def append(self, col, key, field, item):
+        self._record(op='append', col=col, key=key, field=field, item=item)
+    
+    def delete(self, col, key):
+        self._record(op='delete', col=col, key=key)
+    
+    def replace(self, col, value):
+        self._record(op='replace', col=col, value=value)
+    
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        payload = '\n'.join(pending) + '\n'
+        try:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        except Exception:
+            self._pending[:0] = pending
+            raise
+        self.bytes_written += len(payload)
+        
+        self._since_snapshot += len(pending)
+        if self._since_snapshot >= self.compact_every:
+            self.compact()
+    
+    def compact(self):
+        # Rebuild from disk rather than the live cache, so this is safe to
+        # run while the bot keeps mutating its in-memory state.
+        data, snapshot_seq = self._read_snapshot()
+        if data is None:
+            data = empty_data()
+        _, _, last_seq = self._replay(data, snapshot_seq)
+        self._write_snapshot(data, last_seq)
+        with open(self.log_path, 'w'):
+            pass
+        self._since_snapshot = 0
+
+class SqliteBackend(StorageBackend):
+    """Normalised SQLite storage in WAL mode.
+    
+    Tickets keep their indexed columns (user, channel, status, creation time)
+    next to a JSON blob with the remaining fields; transcript messages,
+    ratings, blacklist entries and stats counters get their own tables.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tickets (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            channel_id TEXT,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tickets_user ON tickets(user_id);
+        CREATE INDEX IF NOT EXISTS idx_tickets_channel ON tickets(channel_id);
+        CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);
+        CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets(created_at);
+        
+        CREATE TABLE IF NOT EXISTS transcript_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transcript_ticket ON transcript_messages(ticket_id);
+        
+        CREATE TABLE IF NOT EXISTS ratings (
+            ticket_id TEXT PRIMARY KEY,
+            stars INTEGER NOT NULL,
+            feedback TEXT,
+            rated_at TEXT
+        );
+        
+        CREATE TABLE IF NOT EXISTS blacklist (
+            user_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        
+        CREATE TABLE IF NOT EXISTS stats (
+            metric TEXT NOT NULL,
+            category TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (metric, category)
+        );
+        
+        CREATE TABLE IF NOT EXISTS records (
+            collection TEXT NOT NULL,
+            key TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (collection, key)
+        );
+    """
+    
+    INDEXED_COLUMNS = ('user_id', 'channel_id', 'status', 'created_at')
+    # Collections with dedicated tables; anything else goes to `records`
+    TABLES = ('tickets', 'ratings', 'blacklist', 'stats')
+    
+    def __init__(self, data_dir: str = 'data', filename: str = 'tickets.db'):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, filename)
+        self.conn = None
+        self._pending: List[tuple] = []
+    
+    def load(self) -> Dict[str, Any]:
+        os.makedirs(self.data_dir, exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        if is_new:
+            self._migrate()
+        return self._read_all()
+    
+    def _migrate(self):
+        # One-shot import of whatever the previous engine left behind
+        if os.path.exists(os.path.join(self.data_dir, 'snapshot.json')):
+            data = JournalBackend(self.data_dir).load()
+        else:
+            data = load_json_files(self.data_dir)
+        
+        for ticket_id, ticket in data['tickets'].items():
+            self.put('tickets', ticket_id, ticket)
+        for ticket_id, rating in data['ratings'].items():
+            self.put('ratings', ticket_id, rating)
+        for metric, counts in data['stats'].items():
+            self.put('stats', metric, counts)
+        self.replace('blacklist', data['blacklist'])
+        for col in COLLECTIONS:
+            if col not in self.TABLES:
+                for key, value in data[col].items():
+                    self.put(col, key, value)
+        self.flush()
+    
+    def _read_all(self) -> Dict[str, Any]:
+        data = empty_data()
+        tickets = data['tickets']
+        for ticket_id, blob in self.conn.execute("SELECT id, data FROM tickets ORDER BY created_at, id"):
+            ticket = json.loads(blob)
+            if 'archive' not in ticket:
+                ticket['transcript'] = []
+            tickets[ticket_id] = ticket
+        for ticket_id, blob in self.conn.execute("SELECT ticket_id, data FROM transcript_messages ORDER BY id"):
+            if 'transcript' in tickets.get(ticket_id, {}):
+                tickets[ticket_id]['transcript'].append(json.loads(blob))
+        
+        for ticket_id, stars, feedback, rated_at in self.conn.execute(
+                "SELECT ticket_id, stars, feedback, rated_at FROM ratings"):
+            data['ratings'][ticket_id] = {"stars": stars, "feedback": feedback, "rated_at": rated_at}
+        
+        for metric, category, count in self.conn.execute("SELECT metric, category, count FROM stats"):
+            data['stats'].setdefault(metric, {})[category] = count
+        
+        for user_id, blob in self.conn.execute("SELECT user_id, data FROM blacklist ORDER BY rowid"):
+            data['blacklist'][user_id] = json.loads(blob)
+        
+        for col, key, blob in self.conn.execute("SELECT collection, key, data FROM records ORDER BY rowid"):
+            data.setdefault(col, {})[key] = json.loads(blob)
+        return data
+    
+    def _queue(self, statement, params: tuple = ()):
+        self._pending.append((statement, params))
+    
+    def _put_ticket(self, ticket_id: str, ticket: Dict[str, Any]):
+        row = {k: v for k, v in ticket.items() if k != 'transcript'}
+        self._queue(
+            "INSERT OR REPLACE INTO tickets (id, user_id, channel_id, status, created_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (ticket_id, row['user_id'], row.get('channel_id'), row['status'], row['created_at'],
+             json.dumps(row, default=str))
+        )
+        self._queue("DELETE FROM transcript_messages WHERE ticket_id = ?", (ticket_id,))
+        for message in ticket.get('transcript', []):
+            self.append('tickets', ticket_id, 'transcript', message)
+    
+    def put(self, col, key, value):
+        if col == 'tickets':
+            self._put_ticket(key, value)
+        elif col == 'ratings':
+            self._queue(
+                "INSERT OR REPLACE INTO ratings (ticket_id, stars, feedback, rated_at) VALUES (?, ?, ?, ?)",
+                (key, value['stars'], value.get('feedback'), value.get('rated_at'))
+            )
+        elif col == 'blacklist':
+            self._queue("INSERT OR REPLACE INTO blacklist (user_id, data) VALUES (?, ?)",
+                        (key, json.dumps(value, default=str)))
+        elif col == 'stats':
+            self._queue("DELETE FROM stats WHERE metric = ?", (key,))
+            for category, count in value.items():
+                self._queue("INSERT INTO stats (metric, category, count) VALUES (?, ?, ?)",
+                            (key, category, count))
+        else:
+            self._queue("INSERT OR REPLACE INTO records (collection, key, data) VALUES (?, ?, ?)",
+                        (col, key, json.dumps(value, default=str)))
+    
+    def update(self, col, key, fields):
+        if col != 'tickets':
+            raise ValueError(f"Cannot update collection '{col}'")
+        self._queue(self._apply_ticket_update, (key, dict(fields)))
+    
+    def _apply_ticket_update(self, cur: sqlite3.Cursor, ticket_id: str, fields: Dict[str, Any]):
+        row = cur.execute("SELECT data FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+        if row is None:
+            return
+        ticket = json.loads(row[0])
+        ticket.update(fields)
+        cur.execute(
+            "UPDATE tickets SET user_id = ?, channel_id = ?, status = ?, created_at = ?, data = ? WHERE id = ?",
+            tuple(ticket.get(c) for c in self.INDEXED_COLUMNS) + (json.dumps(ticket, default=str), ticket_id)
+        )
+    
+    def append(self, col, key, field, item):
+        if col != 'tickets' or field != 'transcript':
+            raise ValueError(f"Cannot append to {col}.{field}")
+        self._queue("INSERT INTO transcript_messages (ticket_id, data) VALUES (?, ?)",
+                    (key, json.dumps(item, default=str)))
+    
+    def delete(self, col, key):
+        if col == 'tickets':
+            self._queue("DELETE FROM tickets WHERE id = ?", (key,))
+            self._queue("DELETE FROM transcript_messages WHERE ticket_id = ?", (key,))
+        elif col == 'ratings':
+            self._queue("DELETE FROM ratings WHERE ticket_id = ?", (key,))
+        elif col == 'blacklist':
+            self._queue("DELETE FROM blacklist WHERE user_id = ?", (key,))
+        elif col == 'stats':
+            self._queue("DELETE FROM stats WHERE metric = ?", (key,))
+        else:
+            self._queue("DELETE FROM records WHERE collection = ? AND key = ?", (col, key))
+    
+    def replace(self, col, value):
+        if col != 'blacklist':
+            raise ValueError(f"Cannot replace collection '{col}'")
+        self._queue("DELETE FROM blacklist")
+        for entry in (value.values() if isinstance(value, dict) else value):
+            self._queue("INSERT OR REPLACE INTO blacklist (user_id, data) VALUES (?, ?)",
+                        (entry['user_id'], json.dumps(entry, default=str)))
+    
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            with self.conn:
+                cur = self.conn.cursor()
+                for statement, params in pending:
+                    if callable(statement):
+                        statement(cur, *params)
+                    else:
+                        cur.execute(statement, params)
+        except Exception:
+            self._pending[:0] = pending
+            raise
+        # Approximate: the serialised values handed to SQLite
+        self.bytes_written += sum(len(p) for _, params in pending for p in params if isinstance(p, str))
+    
+    def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+class BackgroundWriter:
+    """Coalesces bursts of mutations into one flush on a worker thread.
+    
+    A flush starts once no mutation has arrived for `delay` seconds, and
+    never later than `max_staleness` seconds after the first unflushed one.
+    """
+    
+    def __init__(self, flush: Callable[[], None], delay: float = 0.5, max_staleness: float = 5.0):
+        self.flush_fn = flush
+        self.delay = delay
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()
+        self._event = asyncio.Event()
+        self._first_dirty = None
+        self._last_dirty = None
+        self._task = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+    
+    def mark_dirty(self):
+        now = asyncio.get_running_loop().time()
+        if self._first_dirty is None:
+            self._first_dirty = now
+        self._last_dirty = now
+        self._event.set()
+    
+    def _flush(self):
+        with self._lock:
+            self.flush_fn()
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._event.wait()
+            while True:
+                deadline = min(self._last_dirty + self.delay, self._first_dirty + self.max_staleness)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(remaining)
+            
+            self._event.clear()
+            self._first_dirty = None
+            try:
+                await asyncio.to_thread(self._flush)
+            except Exception:
+                # Backends requeue what they could not write; try again later
+                traceback.print_exc()
+                self.mark_dirty()
+    
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self._flush)
+
+BACKENDS = {
+    'json': JsonBackend,
+    'journal': JournalBackend,
+    'sqlite': SqliteBackend
+}
+
+def create_backend(name: Optional[str] = None, data_dir: str = 'data') -> StorageBackend:
+    name = (name or os.getenv('DB_BACKEND', 'journal')).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DB_BACKEND '{name}' (expected one of: {', '.join(BACKENDS)})")
+    return BACKENDS[name](data_dir)
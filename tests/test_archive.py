@@ -0,0 +1,52 @@
+import os
+
+from utils.archive import TicketArchive
+
+def ticket(ticket_id: str) -> dict:
+    return {
+        "id": ticket_id,
+        "created_at": "2026-10-01T12:00:00",
+        "closed_at": "2026-10-02T12:00:00",
+        "transcript": [{"author": "user", "content": f"message in {ticket_id}"}]
+    }
+
+def archive_one(archive: TicketArchive, ticket_id: str):
+    archive.store("2026-10", ticket(ticket_id))
+    archive.flush()
+
+def tear_tail(archive: TicketArchive, month: str, size: int = 5):
+    # What a crash part way through an append leaves behind
+    path = archive._file(month)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - size)
+
+def test_append_after_torn_member(tmp_path):
+    archive = TicketArchive(str(tmp_path))
+    archive_one(archive, "t1")
+    archive_one(archive, "t2")
+    tear_tail(archive, "2026-10")
+    
+    # Restart, then archive again
+    archive = TicketArchive(str(tmp_path))
+    archive_one(archive, "t3")
+    
+    archive = TicketArchive(str(tmp_path))
+    assert archive.load("2026-10", "t1")["transcript"][0]["content"] == "message in t1"
+    assert archive.load("2026-10", "t2") is None
+    assert archive.load("2026-10", "t3")["transcript"][0]["content"] == "message in t3"
+
+def test_members_after_torn_one_stay_readable(tmp_path):
+    # Files appended to after a crash by older versions: the torn member
+    # sits between complete ones
+    archive = TicketArchive(str(tmp_path))
+    archive_one(archive, "t1")
+    archive_one(archive, "t2")
+    tear_tail(archive, "2026-10")
+    archive._checked.add("2026-10")
+    archive_one(archive, "t3")
+    
+    archive = TicketArchive(str(tmp_path))
+    assert archive.load("2026-10", "t1") is not None
+    assert archive.load("2026-10", "t3") is not None
+    archive_one(archive, "t4")
+    assert TicketArchive(str(tmp_path)).load("2026-10", "t4") is not None
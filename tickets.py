@@ -1,13 +1,11 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from datetime import datetime
-import os
+import asyncio
+import time
 
-from utils.embeds import EmbedBuilder, PRIMARY_COLOR, SUCCESS_COLOR, WARNING_COLOR
-from utils.database import TicketDatabase
-
-db = TicketDatabase()
+from utils.embeds import EmbedBuilder, PRIMARY_COLOR, WARNING_COLOR
+from utils.metrics import latency, timed
 
 TICKET_TYPES = {
     'support': {
@@ -36,6 +34,8 @@ TICKET_TYPES = {
     }
 }
 
+MAX_OPEN_TICKETS = 1
+
 class TicketTypeSelect(discord.ui.Select):
     def __init__(self):
         options = [
@@ -56,40 +56,56 @@ class TicketTypeSelect(discord.ui.Select):
             custom_id="ticket_type_select"
         )
     
+    @timed("component.ticket_select")
     async def callback(self, interaction: discord.Interaction):
+        # One registered select serves every panel, so read this interaction's
+        # choice rather than the shared self.values
+        await self.open_ticket(interaction, interaction.data["values"][0])
+    
+    async def open_ticket(self, interaction: discord.Interaction, ticket_type: str):
+        db = interaction.client.dbs.get(interaction.guild_id)
+        user_id = str(interaction.user.id)
+        
         # Check blacklist
-        if db.is_blacklisted(str(interaction.user.id)):
+        if db.is_blacklisted(user_id):
             await interaction.response.send_message(
                 embed=EmbedBuilder.error("You are blacklisted from creating tickets!"),
                 ephemeral=True
             )
             return
         
-        # Check max tickets
-        user_tickets = db.get_user_tickets(str(interaction.user.id))
-        if len(user_tickets) >= 1:  # Max 1 ticket per user
+        # Check max tickets, counting ones still being created
+        if not db.begin_ticket_open(user_id, MAX_OPEN_TICKETS):
             await interaction.response.send_message(
                 embed=EmbedBuilder.error(f"You already have an open ticket! Close it first."),
                 ephemeral=True
             )
             return
         
-        await self.create_ticket(interaction, self.values[0])
+        started = time.perf_counter()
+        try:
+            # Acknowledge before any API call so a slow round trip can't
+            # miss the interaction deadline; the result arrives as a followup
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            latency("ticket_open.ack").record(time.perf_counter() - started)
+            
+            await self.create_ticket(interaction, ticket_type)
+        finally:
+            db.end_ticket_open(user_id)
+            latency("ticket_open").record(time.perf_counter() - started)
     
     async def create_ticket(self, interaction: discord.Interaction, ticket_type: str):
         guild = interaction.guild
         user = interaction.user
+        db = interaction.client.dbs.get(guild.id)
         
-        # Get config from environment or config
-        category_id = 1473374359568781403
-        staff_role_id = 1441463909155344576
-        
-        category = guild.get_channel(category_id)
-        staff_role = guild.get_role(staff_role_id)
+        # Set per guild with /config
+        category = guild.get_channel(db.get_config_id('category_id'))
+        staff_role = guild.get_role(db.get_config_id('staff_role_id'))
         
         if not category or not staff_role:
-            await interaction.response.send_message(
-                embed=EmbedBuilder.error("Configuration error. Contact admin."),
+            await interaction.followup.send(
+                embed=EmbedBuilder.error("Tickets aren't set up here yet. An admin can set them up with `/config`."),
                 ephemeral=True
             )
             return
@@ -102,48 +118,84 @@ class TicketTypeSelect(discord.ui.Select):
         }
         
         ticket_info = TICKET_TYPES[ticket_type]
-        channel_name = f"ticket-{db.ticket_counter + 1:04d}"
+        ticket_id = db.reserve_ticket_id()
+        
+        topic = f"West Ticket | {user.name} | {ticket_info['label']}"
+        pool = interaction.client.get_cog("TicketPool")
+        channel = pool.acquire(guild.id) if pool else None
         
         try:
-            channel = await guild.create_text_channel(
-                name=channel_name,
-                category=category,
-                overwrites=overwrites,
-                topic=f"West Ticket | {user.name} | {ticket_info['label']}"
-            )
+            with latency("ticket_open.channel").time():
+                if channel:
+                    # Warm channel from the pool: a single edit makes it the ticket
+                    try:
+                        await channel.edit(name=ticket_id, overwrites=overwrites, topic=topic)
+                    except discord.HTTPException:
+                        # Don't leave it hidden in the category; open a fresh one
+                        await pool.discard(channel)
+                        channel = None
+                if channel is None:
+                    channel = await guild.create_text_channel(
+                        name=ticket_id,
+                        category=category,
+                        overwrites=overwrites,
+                        topic=topic
+                    )
             
             # Save to database
-            ticket_id = db.create_ticket(str(user.id), str(channel.id), ticket_type)
+            db.create_ticket(str(user.id), str(channel.id), ticket_type, ticket_id)
             
-            # Send welcome message
+            # Welcome message and auto-response in one send, in parallel with
+            # telling the user where their ticket is
             embed = EmbedBuilder.ticket_welcome(ticket_type, {'id': ticket_id, **ticket_info}, user)
             view = TicketControlView(ticket_id)
             
-            await channel.send(f"{user.mention} | {staff_role.mention}", embed=embed, view=view)
-            
-            # Auto-response
-            auto_msg = await channel.send("⏳ A staff member will be with you shortly!")
-            
-            await interaction.response.send_message(
-                embed=EmbedBuilder.success(f"Ticket created: {channel.mention}"),
-                ephemeral=True
+            await asyncio.gather(
+                channel.send(
+                    f"{user.mention} | {staff_role.mention}\n⏳ A staff member will be with you shortly!",
+                    embed=embed,
+                    view=view
+                ),
+                interaction.followup.send(
+                    embed=EmbedBuilder.success(f"Ticket created: {channel.mention}"),
+                    ephemeral=True
+                )
             )
-            
+        
         except Exception as e:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 embed=EmbedBuilder.error(f"Error: {str(e)}"),
                 ephemeral=True
             )
 
+class TicketPanelView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+        self.add_item(TicketTypeSelect())
+
+# Ticket buttons carry their ticket in the custom_id and are routed by
+# Tickets.on_interaction, so nothing is kept in memory per ticket
+CONTROL_PREFIX = "ticket:"
+# Buttons sent before the ticket ID was encoded in them
+LEGACY_CONTROLS = {"claim_ticket": "claim", "close_ticket": "close"}
+
 class TicketControlView(discord.ui.View):
     def __init__(self, ticket_id: str):
         super().__init__(timeout=None)
-        self.ticket_id = ticket_id
+        self.add_item(discord.ui.Button(
+            label="Claim", style=discord.ButtonStyle.green, emoji="✅", custom_id=f"{CONTROL_PREFIX}claim:{ticket_id}"
+        ))
+        self.add_item(discord.ui.Button(
+            label="Close", style=discord.ButtonStyle.red, emoji="🔒", custom_id=f"{CONTROL_PREFIX}close:{ticket_id}"
+        ))
+        # Only rendered: a stopped view is never added to the view store
+        self.stop()
     
-    @discord.ui.button(label="Claim", style=discord.ButtonStyle.green, emoji="✅", custom_id="claim_ticket")
-    async def claim_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        staff_role_id = 1441463909155344576
-        staff_role = interaction.guild.get_role(staff_role_id)
+    @staticmethod
+    @timed("component.claim")
+    async def claim(interaction: discord.Interaction, ticket_id: str):
+        db = interaction.client.dbs.get(interaction.guild_id)
+        staff_role = interaction.guild.get_role(db.get_config_id('staff_role_id'))
         
         if staff_role not in interaction.user.roles:
             await interaction.response.send_message(
@@ -152,16 +204,16 @@ class TicketControlView(discord.ui.View):
             )
             return
         
-        ticket = db.get_ticket(self.ticket_id)
+        ticket = db.get_ticket(ticket_id)
         if ticket and ticket.get("claimed_by"):
-            claimer = interaction.guild.get_member(int(ticket["claimed_by"]))
+            # A raw mention, so the claimer needn't be in the member cache
             await interaction.response.send_message(
-                embed=EmbedBuilder.error(f"Already claimed by {claimer.mention}"),
+                embed=EmbedBuilder.error(f"Already claimed by <@{ticket['claimed_by']}>"),
                 ephemeral=True
             )
             return
         
-        if db.claim_ticket(self.ticket_id, str(interaction.user.id)):
+        if db.claim_ticket(ticket_id, str(interaction.user.id)):
             # Update channel permissions
             await interaction.channel.set_permissions(
                 interaction.user,
@@ -180,14 +232,15 @@ class TicketControlView(discord.ui.View):
                 f"✅ {interaction.user.mention} has claimed this ticket!"
             )
     
-    @discord.ui.button(label="Close", style=discord.ButtonStyle.red, emoji="🔒", custom_id="close_ticket")
-    async def close_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        ticket = db.get_ticket(self.ticket_id)
+    @staticmethod
+    @timed("component.close")
+    async def close(interaction: discord.Interaction, ticket_id: str):
+        db = interaction.client.dbs.get(interaction.guild_id)
+        ticket = db.get_ticket(ticket_id)
         if not ticket:
             return
         
-        staff_role_id = 1441463909155344576
-        staff_role = interaction.guild.get_role(staff_role_id)
+        staff_role = interaction.guild.get_role(db.get_config_id('staff_role_id'))
         is_staff = staff_role in interaction.user.roles
         is_owner = str(interaction.user.id) == ticket["user_id"]
         
@@ -198,7 +251,7 @@ class TicketControlView(discord.ui.View):
             )
             return
         
-        view = ConfirmCloseView(self.ticket_id)
+        view = ConfirmCloseView(ticket_id)
         await interaction.response.send_message(
             "⚠️ Are you sure you want to close this ticket?",
             view=view,
@@ -211,149 +264,130 @@ class ConfirmCloseView(discord.ui.View):
         self.ticket_id = ticket_id
     
     @discord.ui.button(label="Yes, Close & Rate", style=discord.ButtonStyle.red, emoji="🔒")
+    @timed("component.confirm_close")
     async def confirm_close(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
         
-        # Close ticket
-        ticket = db.close_ticket(self.ticket_id, str(interaction.user.id))
-        if not ticket:
+        # Write out buffered messages first so the transcript is complete
+        recorder = interaction.client.get_cog("TranscriptRecorder")
+        if recorder:
+            recorder.finish(interaction.guild_id, self.ticket_id)
+        
+        # Archive, transcript upload, rating DM and channel deletion run as a
+        # durable background job, so a restart can't leave it half-closed
+        ticket = interaction.client.dbs.get(interaction.guild_id).get_ticket(self.ticket_id)
+        if not ticket or ticket['status'] != 'open':
             await interaction.followup.send(
                 embed=EmbedBuilder.error("Ticket not found!"),
                 ephemeral=True
             )
             return
         
-        # Generate transcript
-        transcript = generate_transcript(ticket)
-        filename = f"transcripts/{self.ticket_id}.txt"
-        os.makedirs("transcripts", exist_ok=True)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(transcript)
-        
-        # Send to transcripts channel
-        transcripts_channel_id = 1466878461632315527
-        transcripts_channel = interaction.guild.get_channel(transcripts_channel_id)
-        
-        if transcripts_channel:
-            file = discord.File(filename, f"{self.ticket_id}_transcript.txt")
-            embed = discord.Embed(
-                title=f"📝 Transcript • {self.ticket_id}",
-                color=SUCCESS_COLOR,
-                timestamp=datetime.now()
-            )
-            embed.add_field(name="Type", value=TICKET_TYPES[ticket['type']]['label'], inline=True)
-            embed.add_field(name="User", value=f"<@{ticket['user_id']}>", inline=True)
-            embed.add_field(name="Closed By", value=interaction.user.mention, inline=True)
-            if ticket.get('claimed_by'):
-                embed.add_field(name="Claimed By", value=f"<@{ticket['claimed_by']}>", inline=True)
-            
-            await transcripts_channel.send(embed=embed, file=file)
-        
-        # Ask for rating
-        owner = interaction.guild.get_member(int(ticket['user_id']))
-        if owner:
-            try:
-                rating_view = RatingView(self.ticket_id)
-                await owner.send(
-                    f"🔒 Your ticket `{self.ticket_id}` has been closed.\n"
-                    f"Please rate your experience:",
-                    view=rating_view
-                )
-            except:
-                pass
+        queue = interaction.client.get_cog("CloseQueue")
+        queue.enqueue_close(self.ticket_id, interaction.guild.id, interaction.channel.id, str(interaction.user.id))
         
-        # Delete channel
-        await interaction.followup.send("🔒 Closing ticket...", ephemeral=True)
-        await interaction.channel.send("This ticket will close in 5 seconds...")
-        
-        import asyncio
-        await asyncio.sleep(5)
-        await interaction.channel.delete()
-        
-        # Cleanup
-        os.remove(filename)
+        await asyncio.gather(
+            interaction.followup.send("🔒 Closing ticket...", ephemeral=True),
+            interaction.channel.send("This ticket will close in 5 seconds...")
+        )
     
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.gray)
+    @timed("component.cancel_close")
     async def cancel_close(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.edit_message(
             content="❌ Cancelled.",
             view=None
         )
 
+# Rating buttons are sent by DM and routed the same way, carrying the guild
+# and ticket they rate, so they keep working after a restart
+RATING_PREFIX = "rating:"
+
 class RatingView(discord.ui.View):
-    def __init__(self, ticket_id: str):
-        super().__init__(timeout=300)
-        self.ticket_id = ticket_id
-    
-    @discord.ui.button(label="⭐", style=discord.ButtonStyle.primary)
-    async def rate_1(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.submit_rating(interaction, 1)
-    
-    @discord.ui.button(label="⭐⭐", style=discord.ButtonStyle.primary)
-    async def rate_2(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.submit_rating(interaction, 2)
-    
-    @discord.ui.button(label="⭐⭐⭐", style=discord.ButtonStyle.primary)
-    async def rate_3(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.submit_rating(interaction, 3)
-    
-    @discord.ui.button(label="⭐⭐⭐⭐", style=discord.ButtonStyle.primary)
-    async def rate_4(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.submit_rating(interaction, 4)
-    
-    @discord.ui.button(label="⭐⭐⭐⭐⭐", style=discord.ButtonStyle.green)
-    async def rate_5(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.submit_rating(interaction, 5)
+    def __init__(self, guild_id: int, ticket_id: str):
+        super().__init__(timeout=None)
+        for stars in range(1, 6):
+            self.add_item(discord.ui.Button(
+                label="⭐" * stars,
+                style=discord.ButtonStyle.green if stars == 5 else discord.ButtonStyle.primary,
+                custom_id=f"{RATING_PREFIX}{guild_id}:{ticket_id}:{stars}"
+            ))
+        # Only rendered, like TicketControlView
+        self.stop()
     
-    async def submit_rating(self, interaction: discord.Interaction, rating: int):
-        db.add_rating(self.ticket_id, rating)
+    @staticmethod
+    @timed("component.rating")
+    async def submit_rating(interaction: discord.Interaction, guild_id: int, ticket_id: str, rating: int):
+        # Looked up, not opened: a DM's custom_id never creates a partition
+        db = interaction.client.dbs.find(guild_id)
+        ticket = db.get_ticket(ticket_id) if db else None
+        if not ticket or str(interaction.user.id) != ticket["user_id"]:
+            await interaction.response.send_message(
+                embed=EmbedBuilder.error("This rating could not be recorded."),
+                ephemeral=True
+            )
+            return
+        if ticket.get("rating"):
+            await interaction.response.send_message(
+                embed=EmbedBuilder.error("You have already rated this ticket."),
+                ephemeral=True
+            )
+            return
+        
+        db.add_rating(ticket_id, rating)
         await interaction.response.send_message(
             f"⭐ Thank you for rating us {rating}/5!",
             ephemeral=True
         )
-        self.stop()
-
-def generate_transcript(ticket: dict) -> str:
-    lines = [
-        "=" * 60,
-        "WEST SERVICES • TICKET TRANSCRIPT",
-        "=" * 60,
-        f"Ticket ID: {ticket['id']}",
-        f"Type: {TICKET_TYPES.get(ticket['type'], {}).get('label', ticket['type'])}",
-        f"Created: {ticket['created_at']}",
-        f"Closed: {ticket.get('closed_at', 'N/A')}",
-        "=" * 60,
-        "",
-        "MESSAGES:",
-        "-" * 60
-    ]
-    
-    for msg in ticket.get("transcript", []):
-        lines.append(f"[{msg['timestamp'][:19]}] {msg['author']}:")
-        lines.append(f"  {msg['content']}")
-        if msg.get('attachments'):
-            lines.append(f"  [Attachments: {', '.join(msg['attachments'])}]")
-        lines.append("")
-    
-    return "\n".join(lines)
 
 class Tickets(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
     
+    def panel_view(self) -> discord.ui.View:
+        return TicketPanelView()
+    
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        if interaction.type is not discord.InteractionType.component:
+            return
+        
+        custom_id = interaction.data.get("custom_id", "")
+        if custom_id.startswith(RATING_PREFIX):
+            guild_id, ticket_id, stars = custom_id[len(RATING_PREFIX):].rsplit(":", 2)
+            await RatingView.submit_rating(interaction, int(guild_id), ticket_id, int(stars))
+            return
+        if interaction.guild_id is None:
+            return
+        if custom_id.startswith(CONTROL_PREFIX):
+            action, _, ticket_id = custom_id[len(CONTROL_PREFIX):].partition(":")
+        elif custom_id in LEGACY_CONTROLS:
+            # No ID in the button: resolve the ticket through the channel index
+            action = LEGACY_CONTROLS[custom_id]
+            ticket = self.bot.dbs.get(interaction.guild_id).get_ticket_by_channel(interaction.channel_id)
+            ticket_id = ticket["id"] if ticket else None
+        else:
+            return
+        
+        handler = {"claim": TicketControlView.claim, "close": TicketControlView.close}.get(action)
+        if handler and ticket_id:
+            await handler(interaction, ticket_id)
+    
     @app_commands.command(name="ticketpanel", description="Send the ticket panel")
     @app_commands.checks.has_permissions(administrator=True)
+    @timed("command.ticketpanel")
     async def ticket_panel(self, interaction: discord.Interaction):
-        banner_url = "https://cdn.discordapp.com/attachments/1466878461632315527/1475484445564862586/ticketpanl2_1_1.png"
-        embed = EmbedBuilder.ticket_panel(banner_url)
-        view = discord.ui.View(timeout=None)
-        view.add_item(TicketTypeSelect())
+        db = self.bot.dbs.get(interaction.guild_id)
+        embed = EmbedBuilder.ticket_panel(db.get_config()['panel_banner_url'], db.get_average_rating())
+        # The instance registered in setup_hook handles every panel's select
+        view = TicketPanelView()
+        view.stop()
         
         await interaction.response.send_message(embed=embed, view=view)
     
     @app_commands.command(name="add", description="Add a user to the ticket")
     @app_commands.describe(user="User to add")
+    @timed("command.add")
     async def add_user(self, interaction: discord.Interaction, user: discord.Member):
         if not interaction.channel.name.startswith("ticket-"):
             await interaction.response.send_message(
@@ -369,6 +403,7 @@ class Tickets(commands.Cog):
     
     @app_commands.command(name="remove", description="Remove a user from the ticket")
     @app_commands.describe(user="User to remove")
+    @timed("command.remove")
     async def remove_user(self, interaction: discord.Interaction, user: discord.Member):
         if not interaction.channel.name.startswith("ticket-"):
             await interaction.response.send_message(
@@ -384,6 +419,7 @@ class Tickets(commands.Cog):
     
     @app_commands.command(name="rename", description="Rename the ticket")
     @app_commands.describe(name="New name")
+    @timed("command.rename")
     async def rename_ticket(self, interaction: discord.Interaction, name: str):
         if not interaction.channel.name.startswith("ticket-"):
             await interaction.response.send_message(
@@ -0,0 +1,204 @@
+import gzip
+import os
+import re
+import tempfile
+from html import escape
+from typing import BinaryIO, Callable, Dict, Iterator, List
+
+# Rendered transcripts stay in memory up to this size, then spill to disk
+SPOOL_THRESHOLD = int(os.getenv("TRANSCRIPT_SPOOL_BYTES", str(4 * 1024 * 1024)))
+COMPRESS_TRANSCRIPTS = os.getenv("TRANSCRIPT_GZIP", "0") == "1"
+WRITE_CHUNK = 64 * 1024
+# "text", "html" or "both"
+TRANSCRIPT_FORMAT = os.getenv("TRANSCRIPT_FORMAT", "text").lower()
+
+def iter_transcript(ticket: Dict, type_label: str) -> Iterator[str]:
+    yield "=" * 60
+    yield "WEST SERVICES • TICKET TRANSCRIPT"
+    yield "=" * 60
+    yield f"Ticket ID: {ticket['id']}"
+    yield f"Type: {type_label}"
+    yield f"Created: {ticket['created_at']}"
+    yield f"Closed: {ticket.get('closed_at', 'N/A')}"
+    yield "=" * 60
+    yield ""
+    yield "MESSAGES:"
+    yield "-" * 60
+    
+    for msg in ticket.get("transcript", []):
+        if msg.get('event') == 'edit':
+            yield f"[{msg['timestamp'][:19]}] (message {msg['message_id']} edited)"
+            yield f"  {msg['content']}"
+            yield ""
+            continue
+        if msg.get('event') == 'delete':
+            yield f"[{msg['timestamp'][:19]}] (message {msg['message_id']} deleted)"
+            yield ""
+            continue
+        
+        yield f"[{msg['timestamp'][:19]}] {msg['author']}:"
+        yield f"  {msg['content']}"
+        if msg.get('attachments'):
+            yield f"  [Attachments: {', '.join(msg['attachments'])}]"
+        yield ""
+
+class CompiledTemplate:
+    # Parsed once into literal chunks and {{ name }} slots; rendering only
+    # yields pieces, so a whole document is written in a single pass
+    def __init__(self, source: str):
+        parts = re.split(r"\{\{\s*(\w+)\s*\}\}", source)
+        self.literals: List[str] = parts[0::2]
+        self.names: List[str] = parts[1::2]
+    
+    def render(self, context: Dict[str, str]) -> Iterator[str]:
+        for literal, name in zip(self.literals, self.names):
+            yield literal
+            yield context[name]
+        yield self.literals[-1]
+
+HTML_HEAD = CompiledTemplate("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{{ ticket_id }} • Transcript</title>
+<style>
+body { background: #313338; color: #dbdee1; font-family: "gg sans", "Segoe UI", sans-serif; margin: 0; }
+header { background: #2b2d31; padding: 16px 24px; border-bottom: 3px solid #dc2626; }
+header h1 { margin: 0 0 8px; font-size: 20px; color: #fff; }
+.meta span { margin-right: 18px; font-size: 13px; }
+.events { padding: 8px 24px; font-size: 13px; color: #b5bac1; border-bottom: 1px solid #3f4147; }
+.msg { display: flex; padding: 6px 24px; }
+.msg:hover { background: #2e3035; }
+.avatar { width: 40px; height: 40px; border-radius: 50%; margin-right: 14px; flex-shrink: 0; }
+.author { font-weight: 600; color: #fff; }
+.time { font-size: 12px; color: #949ba4; margin-left: 6px; }
+.content { white-space: pre-wrap; word-wrap: break-word; }
+.attachment img { max-width: 420px; max-height: 320px; border-radius: 4px; margin-top: 4px; }
+.embed { border-left: 4px solid #dc2626; background: #2b2d31; padding: 8px 12px; margin-top: 4px; border-radius: 4px; max-width: 520px; }
+.embed .title { font-weight: 600; color: #fff; }
+.system { padding: 4px 24px 4px 78px; font-size: 13px; color: #949ba4; font-style: italic; }
+</style>
+</head>
+<body>
+<header>
+<h1>West Services • {{ ticket_id }}</h1>
+<div class="meta"><span>Type: {{ type_label }}</span><span>User: {{ user_id }}</span><span>Created: {{ created_at }}</span><span>Closed: {{ closed_at }}</span></div>
+</header>
+<div class="events">{{ events }}</div>
+<main>
+""")
+
+HTML_MESSAGE = CompiledTemplate("""<div class="msg" id="m{{ message_id }}"><img class="avatar" src="{{ avatar }}" alt="" loading="lazy"><div><span class="author">{{ author }}</span><span class="time">{{ timestamp }}</span><div class="content">{{ content }}</div>{{ extras }}</div></div>
+""")
+
+HTML_SYSTEM = CompiledTemplate("""<div class="system">{{ text }}</div>
+""")
+
+HTML_TAIL = CompiledTemplate("""</main>
+</body>
+</html>
+""")
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+DEFAULT_AVATAR = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+def _html_events(ticket: Dict) -> str:
+    events = [f"Opened {escape(ticket['created_at'][:19])}"]
+    if ticket.get('claimed_by'):
+        events.append(f"Claimed by {escape(str(ticket['claimed_by']))} at {escape(str(ticket.get('claimed_at'))[:19])}")
+    if ticket.get('closed_at'):
+        events.append(f"Closed by {escape(str(ticket.get('closed_by')))} at {escape(ticket['closed_at'][:19])}")
+    if ticket.get('rating'):
+        rating = ticket['rating']
+        text = f"Rated {'⭐' * int(rating['stars'])} ({rating['stars']}/5)"
+        if rating.get('feedback'):
+            text += f" — {escape(rating['feedback'])}"
+        events.append(text)
+    return " · ".join(events)
+
+def _html_extras(msg: Dict) -> str:
+    parts = []
+    for url in msg.get('attachments', []):
+        safe = escape(url)
+        if url.lower().split('?')[0].endswith(IMAGE_EXTENSIONS):
+            parts.append(f'<div class="attachment"><a href="{safe}"><img src="{safe}" alt="" loading="lazy"></a></div>')
+        else:
+            parts.append(f'<div class="attachment"><a href="{safe}">{safe}</a></div>')
+    for embed in msg.get('embeds', []):
+        style = f' style="border-color: #{embed["color"]:06x}"' if embed.get('color') is not None else ""
+        parts.append(
+            f'<div class="embed"{style}><div class="title">{escape(embed.get("title") or "")}</div>'
+            f'<div class="content">{escape(embed.get("description") or "")}</div></div>'
+        )
+    return "".join(parts)
+
+def iter_html_transcript(ticket: Dict, type_label: str) -> Iterator[str]:
+    yield from HTML_HEAD.render({
+        "ticket_id": escape(ticket['id']),
+        "type_label": escape(type_label),
+        "user_id": escape(str(ticket['user_id'])),
+        "created_at": escape(ticket['created_at'][:19]),
+        "closed_at": escape(str(ticket.get('closed_at') or 'N/A')[:19]),
+        "events": _html_events(ticket)
+    })
+    
+    for msg in ticket.get("transcript", []):
+        if msg.get('event') == 'edit':
+            yield from HTML_SYSTEM.render({
+                "text": f"Message <a href=\"#m{escape(msg['message_id'])}\">{escape(msg['message_id'])}</a> "
+                        f"edited at {escape(msg['timestamp'][:19])}: {escape(msg['content'])}"
+            })
+            continue
+        if msg.get('event') == 'delete':
+            yield from HTML_SYSTEM.render({
+                "text": f"Message <a href=\"#m{escape(msg['message_id'])}\">{escape(msg['message_id'])}</a> "
+                        f"deleted at {escape(msg['timestamp'][:19])}"
+            })
+            continue
+        
+        yield from HTML_MESSAGE.render({
+            "message_id": escape(msg.get('message_id', '')),
+            "avatar": escape(msg.get('avatar') or DEFAULT_AVATAR),
+            "author": escape(msg['author']),
+            "timestamp": escape(msg['timestamp'][:19].replace('T', ' ')),
+            "content": escape(msg['content']),
+            "extras": _html_extras(msg)
+        })
+    
+    yield from HTML_TAIL.render({})
+
+RENDERERS: Dict[str, Callable[[Dict, str], Iterator[str]]] = {
+    "text": lambda ticket, label: (line + "\n" for line in iter_transcript(ticket, label)),
+    "html": iter_html_transcript
+}
+
+EXTENSIONS = {
+    "text": "txt",
+    "html": "html"
+}
+
+def transcript_formats() -> List[str]:
+    return ["text", "html"] if TRANSCRIPT_FORMAT == "both" else [TRANSCRIPT_FORMAT]
+
+def render_transcript(ticket: Dict, type_label: str, fmt: str = "text",
+                      compress: bool = COMPRESS_TRANSCRIPTS) -> BinaryIO:
+    # Starts out as an in-memory buffer and only becomes a temp file past
+    # SPOOL_THRESHOLD; the caller owns the returned file and must close it
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD)
+    stream = gzip.GzipFile(fileobj=buffer, mode="wb") if compress else buffer
+    # Small pieces are grouped into ~64 KiB writes, mostly for gzip's sake
+    pending, size = [], 0
+    for chunk in RENDERERS[fmt](ticket, type_label):
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= WRITE_CHUNK:
+            stream.write("".join(pending).encode("utf-8"))
+            pending, size = [], 0
+    stream.write("".join(pending).encode("utf-8"))
+    if compress:
+        stream.close()
+    buffer.seek(0)
+    return buffer
+
+def transcript_filename(ticket_id: str, fmt: str = "text", compress: bool = COMPRESS_TRANSCRIPTS) -> str:
+    return f"{ticket_id}_transcript.{EXTENSIONS[fmt]}" + (".gz" if compress else "")
@@ -0,0 +1,157 @@
+import re
+from collections import OrderedDict
+from typing import Collection, Dict, FrozenSet, Iterator, Optional, Pattern, Tuple
+
+KINDS = ('keyword', 'regex', 'faq')
+DEFAULT_COOLDOWN = 300
+
+# Scanners kept per engine, one per ticket type and set of cooling rules
+SCANNER_CACHE = 64
+
+# Combined pattern, and group name -> rule ID
+Scanner = Tuple[Optional[Pattern], Dict[str, str]]
+
+def _numbered_reference(pattern: str) -> bool:
+    # \1-style backreferences and (?(1)...) conditionals count groups from
+    # the start of the combined pattern, not from the start of the rule
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            following = pattern[i + 1:i + 2]
+            if not in_class and following and following in "123456789":
+                return True
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            # A ] straight after [ or [^ is a literal
+            i += 2 if pattern[i + 1:i + 2] == "^" else 1
+            if pattern[i:i + 1] == "]":
+                i += 1
+            continue
+        elif pattern.startswith("(?(", i) and pattern[i + 3:i + 4].isdigit():
+            return True
+        i += 1
+    return False
+
+def validate_pattern(kind: str, pattern: str) -> Optional[str]:
+    # Returns an error message, or None if the rule can be compiled
+    if kind not in KINDS:
+        return f"Unknown trigger kind '{kind}'"
+    if kind != 'regex':
+        return None if pattern.strip() else "Pattern is empty"
+    try:
+        # Compiled the way the engine embeds it, so global flags are caught
+        compiled = re.compile(f"(?:{pattern})")
+    except re.error as e:
+        return f"Invalid regex: {e}"
+    if compiled.groupindex:
+        return "Named groups are not allowed in trigger regexes"
+    if _numbered_reference(pattern):
+        return "Numbered backreferences are not allowed in trigger regexes"
+    if compiled.match(""):
+        return "Regex matches an empty message"
+    return None
+
+def _source(rule: Dict) -> str:
+    if rule['kind'] == 'regex':
+        return rule['pattern']
+    # Keywords and FAQ phrases match whole words, whitespace-insensitive;
+    # a boundary only means something next to a word character
+    words = rule['pattern'].split()
+    source = r"\s+".join(re.escape(w) for w in words)
+    if re.match(r"\w", words[0][0]):
+        source = r"\b" + source
+    if re.match(r"\w", words[-1][-1]):
+        source += r"\b"
+    return source
+
+def _applies(rule: Dict, ticket_type: Optional[str]) -> bool:
+    return not rule.get('ticket_types') or ticket_type in rule['ticket_types']
+
+class TriggerEngine:
+    """Trigger rules compiled into one alternation of named groups.
+    
+    A message is scanned once whatever the number of rules; each match
+    reports which rule's group it came from. Each ticket type gets its own
+    alternation of the rules that apply to it. When a rule on cooldown
+    matches, the rest of the scan uses an alternation without the cooling
+    rules, so a rule that can't fire never hides an overlapping one.
+    Rebuilt whenever rules change.
+    """
+    
+    def __init__(self, rules: Dict[str, Dict]):
+        # Rules that can't be embedded are never fired rather than breaking
+        # every other rule's pattern
+        self.rules = {
+            rule_id: rule for rule_id, rule in rules.items()
+            if validate_pattern(rule['kind'], rule['pattern']) is None
+        }
+        # Trigger IDs are numbers: rule 10 comes after rule 2
+        self.order = sorted(self.rules, key=int)
+        self._scanners: "OrderedDict[Tuple[Optional[str], FrozenSet[str]], Scanner]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self.rules)
+    
+    def _scanner(self, ticket_type: Optional[str], cooling: FrozenSet[str]) -> Scanner:
+        key = (ticket_type, cooling)
+        scanner = self._scanners.get(key)
+        if scanner is not None:
+            self._scanners.move_to_end(key)
+            return scanner
+        
+        groups: Dict[str, str] = {}
+        parts = []
+        for rule_id in self.order:
+            rule = self.rules[rule_id]
+            if rule_id in cooling or not _applies(rule, ticket_type):
+                continue
+            group = f"r{rule_id}"
+            groups[group] = rule_id
+            parts.append(f"(?P<{group}>{_source(rule)})")
+        pattern = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        scanner = self._scanners[key] = (pattern, groups)
+        while len(self._scanners) > SCANNER_CACHE:
+            self._scanners.popitem(last=False)
+        return scanner
+    
+    def matches(self, text: str, ticket_type: Optional[str] = None,
+                cooling: Collection[str] = ()) -> Iterator[Dict]:
+        # Rules in the order they appear in the text, each at most once;
+        # rules in `cooling` are left out
+        if not self.rules or not text:
+            return
+        seen = set()
+        pattern, groups = self._scanner(ticket_type, frozenset())
+        if pattern is None:
+            return
+        for match in pattern.finditer(text):
+            rule_id = groups[match.lastgroup]
+            if rule_id in cooling:
+                # Its match may hide an overlapping rule: finish with the
+                # alternation of rules that can fire. Everything before this
+                # point matches the same in both.
+                break
+            if rule_id not in seen:
+                seen.add(rule_id)
+                yield self.rules[rule_id]
+        else:
+            return
+        
+        cooling = frozenset(
+            rule_id for rule_id in cooling
+            if rule_id in self.rules and _applies(self.rules[rule_id], ticket_type)
+        )
+        pattern, groups = self._scanner(ticket_type, cooling)
+        if pattern is None:
+            return
+        for match in pattern.finditer(text):
+            rule_id = groups[match.lastgroup]
+            if rule_id not in seen:
+                seen.add(rule_id)
+                yield self.rules[rule_id]